@@ -0,0 +1,207 @@
+import argparse
+import json
+import math
+import os
+import signal
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import tornado.ioloop
+import tornado.web
+
+import base_margens
+from tabela_coeficientes import calcular_cotacao
+
+PORTA = int(os.environ.get("API_PORTA", "8502"))
+MAX_PARCELAS = 120
+MAX_LOTE = 500
+# Limites folgados para qualquer produto real; acima disso a cotação pode estourar para inf/nan
+MAX_VALOR = 10_000_000
+MAX_TAXA_JUROS = 100
+ESCOLHAS = ('Empréstimo', 'Antecipação Salarial')
+COLUNAS = ("cpf2", "Nome", "Empresa", "Margem", "Parcela Maxima")
+
+
+# Cotação é CPU pura: roda fora do IOLoop para não travar as outras requisições
+_executor = None
+
+
+class ErroRequisicao(Exception):
+    pass
+
+
+def serializar(corpo):
+    # allow_nan=False: o endpoint nunca devolve Infinity/NaN, que não são JSON válido
+    return json.dumps(corpo, ensure_ascii=False, allow_nan=False)
+
+
+def ler_cotacao(pedido):
+    if not isinstance(pedido, dict):
+        raise ErroRequisicao("cada cotação deve ser um objeto JSON")
+    try:
+        valor = float(pedido["valor"])
+        taxa_juros = float(pedido["taxa_juros"])
+        escolha = pedido.get("escolha", 'Empréstimo')
+        parcelas = 1 if escolha == 'Antecipação Salarial' else int(pedido.get("parcelas", 1))
+    except KeyError as e:
+        raise ErroRequisicao(f"campo obrigatório ausente: {e.args[0]}")
+    except (TypeError, ValueError, OverflowError):
+        raise ErroRequisicao("valor, taxa_juros e parcelas devem ser numéricos e finitos")
+    if escolha not in ESCOLHAS:
+        raise ErroRequisicao(f"escolha deve ser uma de: {', '.join(ESCOLHAS)}")
+    if not (math.isfinite(valor) and math.isfinite(taxa_juros)):
+        raise ErroRequisicao("valor e taxa_juros devem ser números finitos")
+    if not 0 <= valor <= MAX_VALOR:
+        raise ErroRequisicao(f"valor deve estar entre 0 e {MAX_VALOR}")
+    if not 0 <= taxa_juros <= MAX_TAXA_JUROS:
+        raise ErroRequisicao(f"taxa_juros deve estar entre 0 e {MAX_TAXA_JUROS}")
+    if not 1 <= parcelas <= MAX_PARCELAS:
+        raise ErroRequisicao(f"parcelas deve estar entre 1 e {MAX_PARCELAS}")
+    data_solicitacao = pedido.get("data_solicitacao")
+    if data_solicitacao is not None and not isinstance(data_solicitacao, str):
+        raise ErroRequisicao("data_solicitacao deve estar no formato dd/mm/aaaa")
+    return valor, taxa_juros, parcelas, escolha, data_solicitacao
+
+
+def cotar(pedido, cronograma=True):
+    valor, taxa_juros, parcelas, escolha, data_solicitacao = ler_cotacao(pedido)
+    try:
+        cotacao = calcular_cotacao(valor, taxa_juros, parcelas, escolha, data_solicitacao)
+    except ValueError:
+        raise ErroRequisicao("data_solicitacao deve estar no formato dd/mm/aaaa")
+    resposta = {
+        "valor": valor,
+        "taxa_juros": taxa_juros,
+        "parcelas": parcelas,
+        "escolha": escolha,
+        "coeficiente": cotacao.coeficiente,
+        "valor_financiado": cotacao.valor_financiado,
+        "valor_prestacao": cotacao.valor_prestacao,
+        "valor_prestacao_com_iof": cotacao.valor_prestacao_com_iof,
+        "iof_adicional": cotacao.iof_adicional,
+        "total_iof": cotacao.total_iof,
+        "valor_financiado_com_iof": cotacao.valor_financiado_com_iof,
+        "vencimentos": [data_venc.date().isoformat() for data_venc in cotacao.datas_vencimento],
+    }
+    if cronograma:
+        resposta["cronograma"] = [
+            {
+                "parcela": i + 1,
+                "vencimento": data_venc.date().isoformat(),
+                "amortizacao": amortizacao,
+                "saldo_devedor": saldo,
+                "iof": iof,
+            }
+            for i, (data_venc, amortizacao, saldo, iof) in enumerate(zip(
+                cotacao.datas_vencimento, cotacao.amortizacoes, cotacao.saldos_devedores, cotacao.iof_diario_parcelas))
+        ]
+    return resposta
+
+
+def processar_cotacoes(corpo):
+    # Executa no pool de processos; devolve (status, JSON já serializado)
+    if isinstance(corpo, list):
+        corpo = {"cotacoes": corpo}
+    if isinstance(corpo, dict) and "cotacoes" in corpo:
+        lote = corpo["cotacoes"]
+        if not isinstance(lote, list):
+            return 400, serializar({"erro": "cotacoes deve ser uma lista"})
+        if len(lote) > MAX_LOTE:
+            return 413, serializar({"erro": f"no máximo {MAX_LOTE} cotações por chamada"})
+        # Em lote o cronograma parcela a parcela só vem se pedido: é a maior parte do corpo
+        cronograma = corpo.get("cronograma") is True
+        resultados = []
+        for pedido in lote:
+            try:
+                resultados.append(cotar(pedido, cronograma))
+            except ErroRequisicao as e:
+                resultados.append({"erro": str(e)})
+        return 200, serializar({"cotacoes": resultados})
+    try:
+        return 200, serializar(cotar(corpo))
+    except ErroRequisicao as e:
+        return 400, serializar({"erro": str(e)})
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def responder(self, corpo, status=200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(serializar(corpo))
+
+    def write_error(self, status_code, **kwargs):
+        self.responder({"erro": self._reason}, status_code)
+
+
+class CpfHandler(BaseHandler):
+    def get(self, cpf):
+        try:
+            dados = base_margens.buscar_cpf(cpf)
+        except (FileNotFoundError, ValueError, sqlite3.Error):
+            return self.responder({"erro": "base de margens indisponível"}, 503)
+        if dados is None:
+            return self.responder({"erro": "CPF não encontrado"}, 404)
+        self.responder(dict(zip(COLUNAS, dados)))
+
+
+class CotacaoHandler(BaseHandler):
+    async def post(self):
+        try:
+            corpo = json.loads(self.request.body or b"null")
+        except ValueError:
+            return self.responder({"erro": "corpo não é um JSON válido"}, 400)
+
+        # Lote: {"cotacoes": [...]} ou uma lista; cada item tem seu próprio resultado ou erro
+        status, resposta = await tornado.ioloop.IOLoop.current().run_in_executor(_executor, processar_cotacoes, corpo)
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(resposta)
+
+
+def criar_aplicacao():
+    return tornado.web.Application([
+        (r"/cpf/(\d{11})", CpfHandler),
+        (r"/quote", CotacaoHandler),
+    ])
+
+
+def ignorar_interrupcao():
+    # Ctrl+C chega ao grupo todo; quem encerra os processos de cotação é o servidor, via shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+async def servir(porta=PORTA, observar=True, workers=None):
+    global _executor
+    # Sobe os processos de cotação antes do índice e do observador: saem leves e sem threads herdadas
+    _executor = ProcessPoolExecutor(workers, initializer=ignorar_interrupcao)
+    await tornado.ioloop.IOLoop.current().run_in_executor(_executor, processar_cotacoes, {"valor": 0, "taxa_juros": 0})
+    # O índice é carregado antes de aceitar conexões: nenhuma requisição paga a carga
+    if base_margens.BACKEND == "memoria":
+        base_margens.obter_indice()
+        if observar:
+            base_margens.iniciar_observador()
+    servidor = criar_aplicacao().listen(porta)
+    return servidor
+
+
+def tratar_sinais(loop):
+    # SIGTERM/SIGINT param o IOLoop; o pool de cotação é encerrado na saída, senão os processos ficam órfãos
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        loop.asyncio_loop.add_signal_handler(sinal, loop.stop)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API JSON de consulta de margem e cotação.")
+    parser.add_argument("--porta", type=int, default=PORTA)
+    parser.add_argument("--sem-observador", action="store_true", help="não recarrega a planilha quando ela mudar")
+    parser.add_argument("--workers", type=int, help="processos de cotação; padrão: um por CPU")
+    args = parser.parse_args()
+
+    loop = tornado.ioloop.IOLoop.current()
+    loop.run_sync(lambda: servir(args.porta, not args.sem_observador, args.workers))
+    tratar_sinais(loop)
+    print(f"API ouvindo na porta {args.porta}")
+    try:
+        loop.start()
+    finally:
+        _executor.shutdown(cancel_futures=True)
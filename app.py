@@ -1,133 +1,87 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-import pytz
+import io
+import logging
+import os
+import sqlite3
+import threading
 import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import base_margens
+import instrumentacao
+import tabela_coeficientes
+from calculos import tz
+from tabela_coeficientes import calcular_cotacao
 
-tz = pytz.timezone('America/Sao_Paulo')
+# Erro ao ler a base (planilha sendo trocada, banco indisponível), diferente de CPF não encontrado
+FALHA_BASE = object()
 
 def carregar_dados_cpf(cpf):
     try:
-        df = pd.read_excel("Planilha/margens.xlsx", dtype=str, engine='openpyxl')
-        return df[df["cpf2"] == cpf]
-    except pd.errors.ParserError:
-        st.error("Erro ao ler o arquivo Excel. Verifique o formato do arquivo.")
-        return pd.DataFrame()
+        return base_margens.buscar_cpf(cpf)
     except FileNotFoundError:
         st.error("Arquivo Excel não encontrado. Verifique o caminho do arquivo.")
-        return pd.DataFrame()
+        return FALHA_BASE
     except ImportError:
         st.error("Biblioteca openpyxl não instalada. Execute 'pip install openpyxl' para instalá-la.")
-        return pd.DataFrame()
-
-def calcular_datas_vencimento(data_solicitacao, parcelas):
-    data_solicitacao = datetime.strptime(data_solicitacao, '%d/%m/%Y')
-    if data_solicitacao.day <= 10:
-        if data_solicitacao.month == 12:
-            primeira_parcela = data_solicitacao.replace(day=10, month=1, year=data_solicitacao.year + 1)
-        else:
-            primeira_parcela = data_solicitacao.replace(day=10, month=data_solicitacao.month + 1)
-    else:
-        if data_solicitacao.month == 12:
-            primeira_parcela = data_solicitacao.replace(day=10, month=2, year=data_solicitacao.year + 1)
-        else:
-            primeira_parcela = data_solicitacao.replace(day=10, month=data_solicitacao.month + 2)
-    datas_vencimento = [primeira_parcela]
-    for i in range(1, parcelas):
-        mes = (primeira_parcela.month + i - 1) % 12 + 1
-        ano = primeira_parcela.year + (primeira_parcela.month + i - 1) // 12
-        datas_vencimento.append(datetime(year=ano, month=mes, day=10))
-    return datas_vencimento
-
-def calcular_dias_vencimento(datas_vencimento, data_solicitacao):
-    dias_vencimento = []
-    dias_acumulados = []
-    for i, data_venc in enumerate(datas_vencimento):
-        if i == 0:
-            dias = (data_venc - data_solicitacao).days
-        else:
-            dias = (data_venc - datas_vencimento[i - 1]).days
-        dias_vencimento.append(dias)
-        if i == 0:
-            dias_acumulados.append(dias)
-        else:
-            dias_acumulados.append(dias_acumulados[i - 1] + dias)
-    return dias_vencimento, dias_acumulados
-
-def calcular_fatores(taxa_juros, dias_acumulados):
-    fatores = []
-    taxa_juros_decimal = float(taxa_juros) / 100
-    for dias in dias_acumulados:
-        fator = 1 / ((1 + taxa_juros_decimal) ** (dias / 30))
-        fatores.append(fator)
-    return fatores
-
-def calcular_coeficiente(fatores):
-    soma_fatores = sum(fatores)
-    coeficiente = 1 / soma_fatores
-    return coeficiente
-
-def calcular_valor_financiado(valor, escolha):
-    if escolha == 'Empréstimo':
-        TC = 150.29
-        Seguro = 77.70
-        valor_financiado = float(valor) + TC + Seguro
-    elif escolha == 'Antecipação Salarial':
-        TC_Antecipacao = 50.00
-        valor_financiado = float(valor) + TC_Antecipacao
-    return valor_financiado
-
-def calcular_taxa_juros_parcela(taxa_juros, dias_vencimento):
-    taxas_juros = []
-    taxa_juros_decimal = float(taxa_juros) / 100
-    for dias in dias_vencimento:
-        taxa_parcela = ((1 + taxa_juros_decimal) ** (dias / 30)) - 1
-        taxas_juros.append(taxa_parcela * 100)
-    return taxas_juros
-
-def calcular_valor_prestacao(valor_financiado, coeficiente):
-    return valor_financiado * coeficiente
-
-def calcular_iof_diario(amortizacoes, dias_acumulados):
-    iof_diario = []
-    for amortizacao, dias in zip(amortizacoes, dias_acumulados):
-        if dias > 365:
-            iof_parcela = amortizacao * 0.03
-        else:
-            iof_parcela = amortizacao * dias * 0.000082
-        iof_diario.append(iof_parcela)
-    return iof_diario
-
-def calcular_iof_adicional(valor_financiado):
-    return valor_financiado * 0.0038
-
-def calcular_amortizacao_e_saldo_devedor(valor_financiado, coeficiente, parcelas, taxas_juros_parcela, dias_acumulados):
-    saldo_devedor = valor_financiado
-    amortizacoes = []
-    saldos_devedores = []
-    iof_diario_parcelas = []
-
-    for i in range(parcelas):
-        juros_parcela = saldo_devedor * (taxas_juros_parcela[i] / 100)
-        saldo_devedor += juros_parcela
-        amortizacao = calcular_valor_prestacao(valor_financiado, coeficiente) - juros_parcela
-        saldo_devedor_final = saldo_devedor - calcular_valor_prestacao(valor_financiado, coeficiente)
-
-        if dias_acumulados[i] > 365:
-            iof_diario = amortizacao * 0.03
-        else:
-            iof_diario = amortizacao * dias_acumulados[i] * 0.000082
-        iof_diario_parcelas.append(iof_diario)
+        return FALHA_BASE
+    except ValueError:
+        st.error("Erro ao ler o arquivo Excel. Verifique o formato do arquivo.")
+        return FALHA_BASE
+    except sqlite3.Error:
+        st.error("Erro ao consultar a base de margens. Tente novamente em instantes.")
+        return FALHA_BASE
 
-        amortizacoes.append(amortizacao)
-        saldos_devedores.append(saldo_devedor_final)
-        saldo_devedor = saldo_devedor_final
+CAMINHO_LOGO = "images/MARCA_CONSIGO_CRED_VETOR_CURVAS_5.png"
+LARGURA_LOGO = 200
 
-    return amortizacoes, saldos_devedores, iof_diario_parcelas
+@st.cache_resource(show_spinner=False)
+def ler_css(file_name):
+    with open(file_name) as f:
+        return f'<style>{f.read()}</style>'
+
+@st.cache_resource(show_spinner=False)
+def ler_logo(caminho, largura):
+    from PIL import Image
+
+    # O PNG original tem 2464px; redimensionar a cada execução custava ~100 ms
+    imagem = Image.open(caminho)
+    altura = int(imagem.height * largura / imagem.width)
+    saida = io.BytesIO()
+    imagem.resize((largura, altura), resample=Image.BILINEAR).save(saida, format="PNG")
+    return saida.getvalue()
+
+@st.cache_resource(show_spinner=False)
+def aquecer():
+    # Uma vez por processo: carrega índice de margens e módulos pesados fora do caminho da requisição.
+    # O estado devolvido vai para o painel de depuração
+    estado = {"ativo": os.environ.get("APP_AQUECER", "1") != "0", "concluido": False, "erro": None}
+
+    def carregar():
+        try:
+            import calculos_vetorizados  # noqa: F401
+
+            tabela_coeficientes.reconstruir()
+            if base_margens.BACKEND == "sqlite":
+                import margens_sqlite
+
+                margens_sqlite.preparar_filtro()
+        except Exception as e:
+            # O app segue funcionando sem aquecimento (cada etapa é refeita sob demanda), mas a falha não some
+            logging.getLogger("aquecimento").exception("Falha no aquecimento")
+            estado["erro"] = f"{type(e).__name__}: {e}"
+        finally:
+            estado["concluido"] = True
+
+    if estado["ativo"]:
+        threading.Thread(target=carregar, name="aquecimento", daemon=True).start()
+        if base_margens.BACKEND == "memoria":
+            # Carrega o índice e recarrega sozinho quando o RH trocar a planilha
+            base_margens.iniciar_observador()
+    return estado
 
 def carregar_css(file_name):
-    with open(file_name) as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    st.markdown(ler_css(file_name), unsafe_allow_html=True)
 
 def set_numeric_input_js():
     components.html(
@@ -143,130 +97,279 @@ def set_numeric_input_js():
         height=0,
     )
 
+def sugerir_prazo(valor, taxa_juros, escolha, margem, parcela_maxima):
+    import calculos_vetorizados
+
+    tabela = calculos_vetorizados.tabela_prazos(taxa_juros, escolha)
+    parcelas_minimas = calculos_vetorizados.prazo_minimo(tabela, valor, parcela_maxima)
+    if parcelas_minimas is not None:
+        st.info(f"Com {parcelas_minimas} parcelas o valor de R$ {valor:,.2f} cabe na sua parcela máxima.")
+        return
+    valores, _ = calculos_vetorizados.valores_maximos(tabela, parcela_maxima, margem)
+    if valores.max() > 0:
+        st.info(f"O maior valor que cabe na sua parcela máxima é R$ {valores.max():,.2f}, em {int(tabela.parcelas[valores.argmax()])} parcelas.")
+
+def exibir_valores_maximos(taxa_juros, escolha, margem, parcela_maxima):
+    import calculos_vetorizados
+
+    tabela = calculos_vetorizados.tabela_prazos(taxa_juros, escolha)
+    valores, prestacoes = calculos_vetorizados.valores_maximos(tabela, parcela_maxima, margem)
+    disponiveis = valores > 0
+    st.dataframe(
+        {
+            "Quantidade de parcelas": tabela.parcelas[disponiveis],
+            "Valor máximo": [f"R$ {v:,.2f}" for v in valores[disponiveis]],
+            "Valor da Parcela": [f"R$ {p:,.2f}" for p in prestacoes[disponiveis]],
+        },
+        use_container_width=True,
+        hide_index=True,
+    )
+
+def sessao_atual():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def exibir_painel_debug():
+    with st.expander("Depuração: tempos por etapa"):
+        st.dataframe(instrumentacao.resumo_por_etapa(), use_container_width=True, hide_index=True)
+        recentes = [
+            {"sessao": r["sessao"], "escopo": r["escopo"], "horario": r["horario"], "total_ms": r["total_ms"], **r["etapas_ms"]}
+            for r in reversed(instrumentacao.registros)
+        ]
+        st.dataframe(recentes[:50], use_container_width=True, hide_index=True)
+        st.markdown("Aquecimento")
+        st.json(aquecer())
+        st.markdown("Base de margens")
+        st.json(base_margens.estado_recarga())
+        st.markdown("Tabela de coeficientes")
+        st.json(tabela_coeficientes.estado())
+
+# st.fragment só existe a partir do Streamlit 1.37
+fragmento = getattr(st, "fragment", None) or st.experimental_fragment
+
+def iniciar_execucao(escopo):
+    debug = instrumentacao.debug_autorizado(st.query_params.get("debug"))
+    return instrumentacao.iniciar(sessao_atual(), debug, escopo), debug
+
 def main():
-    st.set_page_config(page_title="Calculadora de Empréstimo/Antecipação Salarial", layout="wide")
-    carregar_css("style.css")
-    set_numeric_input_js()
+    execucao, debug = iniciar_execucao("app")
+    try:
+        renderizar(execucao)
+    finally:
+        execucao.finalizar()
+    if debug:
+        exibir_painel_debug()
 
-    st.image("images/MARCA_CONSIGO_CRED_VETOR_CURVAS_5.png", width=200)
+def renderizar(execucao):
+    st.set_page_config(page_title="Calculadora de Empréstimo/Antecipação Salarial", layout="wide")
+    aquecer()
+    with execucao.etapa("carregar_css"):
+        carregar_css("style.css")
+    with execucao.etapa("set_numeric_input_js"):
+        set_numeric_input_js()
+
+    with execucao.etapa("logo"):
+        st.image(ler_logo(CAMINHO_LOGO, LARGURA_LOGO), width=LARGURA_LOGO)
     st.markdown('<h1 style="color: #7CB26E;">Calculadora de Empréstimo/Antecipação Salarial</h1>', unsafe_allow_html=True)
 
-    if "cpf_validado" not in st.session_state:
-        st.session_state.cpf_validado = False
-
-    if not st.session_state.cpf_validado:
-        cpf = st.text_input("Digite seu CPF (somente números):", max_chars=11)
-        if len(cpf) == 11 and cpf.isdigit():
-            if st.button('Buscar'):
-                dados_cpf = carregar_dados_cpf(cpf)
-                if not dados_cpf.empty:
-                    st.session_state.cpf_validado = True
-                    st.session_state.dados_cpf = dados_cpf.to_dict(orient='records')[0]
+    # A sessão guarda só o CPF; o registro vem do índice compartilhado a cada execução
+    registro = None
+    if "cpf" in st.session_state:
+        registro = carregar_dados_cpf(st.session_state.cpf)
+        if registro is FALHA_BASE:
+            # Falha passageira: o CPF continua na sessão e a próxima execução tenta de novo
+            st.button("Tentar novamente")
+            st.stop()
+        if registro is None:
+            # CPF saiu da base numa recarga da planilha: volta para a busca
+            del st.session_state.cpf
+
+    if registro is None:
+        # Digitar o CPF não reexecuta o script; só o envio do formulário
+        with st.form("form_cpf"):
+            cpf = st.text_input("Digite seu CPF (somente números):", max_chars=11)
+            buscar = st.form_submit_button('Buscar')
+        if buscar:
+            if len(cpf) == 11 and cpf.isdigit() and not base_margens.cpf_valido(cpf):
+                st.warning("CPF inválido: os dígitos verificadores não conferem. Confira se digitou corretamente.")
+            elif len(cpf) == 11 and cpf.isdigit():
+                with execucao.etapa("busca_cpf"):
+                    registro = carregar_dados_cpf(cpf)
+                if registro is FALHA_BASE:
+                    registro = None
+                elif registro is not None:
+                    st.session_state.cpf = cpf
+                    st.rerun()
                 else:
                     st.warning("Infelizmente não localizamos seu CPF em nossa base de cadastro, confira se digitou corretamente ou entre em contato com RH da sua empresa.")
-        else:
-            st.warning("Por favor, insira um CPF válido com 11 dígitos.")
+            else:
+                st.warning("Por favor, insira um CPF válido com 11 dígitos.")
     else:
-        dados_cpf = st.session_state.dados_cpf
-        nome = dados_cpf["Nome"]
-        empresa = dados_cpf["Empresa"]
-        margem = float(dados_cpf["Margem"])
-        parcela_maxima = float(dados_cpf["Parcela Maxima"])
+        nome = registro.nome
+        empresa = registro.empresa
+        margem = registro.margem
+        parcela_maxima = registro.parcela_maxima
 
         st.markdown(f"<p>Olá {nome}, confira as informações abaixo:</p>", unsafe_allow_html=True)
         st.markdown(f"<p>Trabalha na empresa: {empresa}</p>", unsafe_allow_html=True)
         st.markdown(f"<p>Margem pré-aprovada: R$ {margem:,.2f}</p>", unsafe_allow_html=True)
         st.markdown(f"<p>Parcela máxima: R$ {parcela_maxima:,.2f}</p>", unsafe_allow_html=True)
 
-        if "reset_form" not in st.session_state:
-            st.session_state.reset_form = False
+        painel_calculadora(margem, parcela_maxima)
 
-        if st.session_state.reset_form:
-            st.session_state.valor = 0.0
-            st.session_state.taxa_juros = 0.0
-            st.session_state.parcelas = 1
-            st.session_state.escolha = "Empréstimo"
-            st.session_state.reset_form = False
+@fragmento
+def painel_calculadora(margem, parcela_maxima):
+    # Interações aqui reexecutam só este painel, sem recarregar CSS, logo e cabeçalho
+    execucao, _ = iniciar_execucao("calculadora")
+    try:
+        renderizar_calculadora(execucao, margem, parcela_maxima)
+    finally:
+        execucao.finalizar()
+
+CAMPOS_SIMULACAO = ('valor', 'taxa_juros', 'parcelas')
+
+def preservar_campos(escolha, parcela_maxima):
+    # Entrar ou sair do formulário (cotação ao vivo) recria os campos e o Streamlit descartaria
+    # os valores; regravá-los pela session_state antes de desenhar mantém o que foi digitado.
+    # Ao trocar a operação os campos recomeçam, como antes
+    if st.session_state.get("escolha_campos") == escolha:
+        for campo in CAMPOS_SIMULACAO:
+            if campo in st.session_state:
+                st.session_state[campo] = st.session_state[campo]
+    elif escolha == 'Antecipação Salarial':
+        st.session_state.valor = parcela_maxima
+    st.session_state.escolha_campos = escolha
 
-        col1, col2 = st.columns([1, 2])
+def campos_simulacao(escolha, margem, parcela_maxima):
+    if escolha == 'Empréstimo':
+        valor = st.number_input("Valor solicitado (R$):", min_value=0.0, max_value=margem, step=0.01, key='valor')
+    else:
+        valor = st.number_input("Valor solicitado (R$):", min_value=0.0, max_value=parcela_maxima, step=0.01, key='valor')
+    taxa_juros = st.number_input("Taxa de juros mensal (%):", min_value=0.0, step=0.01, key='taxa_juros', format="%f")
+    if escolha == 'Empréstimo':
+        parcelas = st.number_input("Quantidade de parcelas:", min_value=1, step=1, key='parcelas')
+    else:
+        parcelas = 1
+        st.markdown('<p style="color: #7CB26E;">A quantidade de parcelas para antecipação salarial é sempre 1.</p>', unsafe_allow_html=True)
+    return valor, taxa_juros, parcelas
+
+def renderizar_calculadora(execucao, margem, parcela_maxima):
+    col1, col2 = st.columns([1, 2])
+
+    with col1:
+        st.markdown('<p style="color: #7CB26E; font-weight: bold;">Tipo de operação:</p>', unsafe_allow_html=True)
+        escolha = st.radio("", ('Empréstimo', 'Antecipação Salarial'), key='escolha')
+
+        st.markdown(f'<p style="color: #7CB26E;">Data de solicitação: {datetime.now(tz).strftime("%d/%m/%Y")}</p>', unsafe_allow_html=True)
+        ao_vivo = st.toggle("Cotação ao vivo", key='cotacao_ao_vivo')
+        preservar_campos(escolha, parcela_maxima)
+        if ao_vivo:
+            # Cada alteração recalcula só o painel de resultado
+            valor, taxa_juros, parcelas = campos_simulacao(escolha, margem, parcela_maxima)
+            calcular = valor > 0
+        else:
+            with st.form("form_calculo"):
+                valor, taxa_juros, parcelas = campos_simulacao(escolha, margem, parcela_maxima)
+                calcular = st.form_submit_button('Calcular')
+
+        if escolha == 'Empréstimo' and st.checkbox("Ver valor máximo por quantidade de parcelas"):
+            exibir_valores_maximos(taxa_juros, escolha, margem, parcela_maxima)
+
+        # Guarda só os parâmetros: o resultado continua visível ao paginar o cronograma,
+        # mas some assim que a operação ou um dos campos deixa de bater com ele
+        atual = (valor, taxa_juros, parcelas, escolha)
+        if calcular:
+            st.session_state.simulacao = atual
+        elif ao_vivo:
+            # Ao vivo o resultado é sempre o dos campos atuais, ou nenhum
+            st.session_state.pop("simulacao", None)
+        if st.session_state.get("simulacao") != atual:
+            st.session_state.pop("simulacao", None)
+        if st.session_state.get("simulacao"):
+            exibir_resultado(execucao, col2, *st.session_state.simulacao, margem, parcela_maxima)
+
+LINHAS_POR_PAGINA = 12
+
+COLUNAS_PARCELAS = {
+    "Data de Vencimento": st.column_config.DateColumn(format="DD/MM/YYYY"),
+    "Valor da Parcela": st.column_config.NumberColumn(format="R$ %.2f"),
+}
+
+COLUNAS_CRONOGRAMA = {
+    "Data de Vencimento": st.column_config.DateColumn(format="DD/MM/YYYY"),
+    **{
+        coluna: st.column_config.NumberColumn(format="R$ %.2f")
+        for coluna in ("Prestação sem IOF", "Juros", "Amortização", "Saldo Devedor", "IOF")
+    },
+}
+
+def exibir_cronograma(cotacao):
+    parcelas = len(cotacao.datas_vencimento)
+    paginas = (parcelas - 1) // LINHAS_POR_PAGINA + 1
+    pagina = 1
+    if paginas > 1:
+        pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, step=1, key='pagina_cronograma')
+    # Monta apenas as linhas da página exibida
+    inicio = (pagina - 1) * LINHAS_POR_PAGINA
+    fim = min(inicio + LINHAS_POR_PAGINA, parcelas)
+    amortizacoes = cotacao.amortizacoes[inicio:fim]
+    st.dataframe(
+        {
+            "Número da Parcela": list(range(inicio + 1, fim + 1)),
+            "Data de Vencimento": [data_venc.date() for data_venc in cotacao.datas_vencimento[inicio:fim]],
+            "Prestação sem IOF": [cotacao.valor_prestacao] * (fim - inicio),
+            "Juros": [cotacao.valor_prestacao - amortizacao for amortizacao in amortizacoes],
+            "Amortização": amortizacoes,
+            "Saldo Devedor": [max(saldo, 0.0) for saldo in cotacao.saldos_devedores[inicio:fim]],
+            "IOF": cotacao.iof_diario_parcelas[inicio:fim],
+        },
+        column_config=COLUNAS_CRONOGRAMA,
+        use_container_width=True,
+        hide_index=True,
+    )
 
-        with col1:
-            st.markdown('<p style="color: #7CB26E; font-weight: bold;">Tipo de operação:</p>', unsafe_allow_html=True)
-            escolha = st.radio("", ('Empréstimo', 'Antecipação Salarial'), key='escolha')
+def exibir_resultado(execucao, col2, valor, taxa_juros, parcelas, escolha, margem, parcela_maxima):
+    try:
+        with execucao.etapa("calculo"):
+            cotacao = calcular_cotacao(valor, taxa_juros, parcelas, escolha)
+        datas_vencimento = cotacao.datas_vencimento
+        valor_prestacao_com_iof = cotacao.valor_prestacao_com_iof
 
-            st.markdown(f'<p style="color: #7CB26E;">Data de solicitação: {datetime.now(tz).strftime("%d/%m/%Y")}</p>', unsafe_allow_html=True)
-            if escolha == 'Empréstimo':
-                valor = st.number_input("Valor solicitado (R$):", min_value=0.0, max_value=margem, step=0.01, key='valor')
-                if valor > margem:
-                    st.warning(f"O valor máximo liberado para você é de R$ {margem:,.2f}")
-            else:
-                valor = st.number_input("Valor solicitado (R$):", min_value=0.0, max_value=parcela_maxima, value=parcela_maxima, step=0.01, key='valor')
-                if valor > parcela_maxima:
-                    st.warning(f"O valor máximo liberado para você é de R$ {parcela_maxima:,.2f}")
-            taxa_juros = st.number_input("Taxa de juros mensal (%):", min_value=0.0, step=0.01, key='taxa_juros', format="%f")
+        if valor_prestacao_com_iof > parcela_maxima:
+            st.error(f"Sua parcela não pode ser maior que a parcela máxima de R$ {parcela_maxima:,.2f}. Simule novamente e tente aumentar a quantidade de parcelas em seu empréstimo.")
             if escolha == 'Empréstimo':
-                parcelas = st.number_input("Quantidade de parcelas:", min_value=1, step=1, key='parcelas')
-            else:
-                parcelas = 1
-                st.markdown('<p style="color: #7CB26E;">A quantidade de parcelas para antecipação salarial é sempre 1.</p>', unsafe_allow_html=True)
-
-            if st.button('Calcular'):
-                try:
-                    data_solicitacao = datetime.now(tz).strftime('%d/%m/%Y')
-                    data_solicitacao_dt = datetime.strptime(data_solicitacao, '%d/%m/%Y')
-                    datas_vencimento = calcular_datas_vencimento(data_solicitacao, parcelas)
-                    dias_vencimento, dias_acumulados = calcular_dias_vencimento(datas_vencimento, data_solicitacao_dt)
-                    fatores = calcular_fatores(taxa_juros, dias_acumulados)
-                    coeficiente = calcular_coeficiente(fatores)
-                    taxas_juros_parcela = calcular_taxa_juros_parcela(taxa_juros, dias_vencimento)
-                    valor_financiado_inicial = calcular_valor_financiado(valor, escolha)
-                    valor_prestacao = calcular_valor_prestacao(valor_financiado_inicial, coeficiente)
-                    amortizacoes, saldos_devedores, iof_diario_parcelas = calcular_amortizacao_e_saldo_devedor(
-                        valor_financiado_inicial, coeficiente, parcelas, taxas_juros_parcela, dias_acumulados)
-                    iof_adicional = calcular_iof_adicional(valor_financiado_inicial)
-                    total_iof = iof_adicional + sum(iof_diario_parcelas)
-                    valor_financiado_com_iof = valor_financiado_inicial + total_iof
-                    valor_prestacao_com_iof = calcular_valor_prestacao(valor_financiado_com_iof, coeficiente)
-
-                    if valor_prestacao_com_iof > parcela_maxima:
-                        st.error(f"Sua parcela não pode ser maior que a parcela máxima de R$ {parcela_maxima:,.2f}. Simule novamente e tente aumentar a quantidade de parcelas em seu empréstimo.")
-                    else:
-                        # Adicionar espaço vazio na col2
-                        with col2:
-                            st.write("")
-                            st.write("")
-                            st.write("")
-                            st.markdown(f'<p style="color: #7CB26E;">Valor solicitado: R$ {valor:,.2f}</p>', unsafe_allow_html=True)
-                            st.markdown(f'<p style="color: #7CB26E;">Taxa de Juros: {taxa_juros}%</p>', unsafe_allow_html=True)
-                            st.markdown(f'<p style="color: #7CB26E;">Quantidade de parcelas: {parcelas}</p>', unsafe_allow_html=True)
-
-                            data = {
-                                "Número da Parcela": list(range(1, parcelas + 1)),
-                                "Data de Vencimento": [data_venc.strftime('%d/%m/%Y') for data_venc in datas_vencimento],
-                                "Valor da Parcela": [f"R$ {valor_prestacao_com_iof:,.2f}" for _ in range(parcelas)]
-                            }
-                            df = pd.DataFrame(data)
-                            
-                            # Estilizar o DataFrame
-                            styled_df = df.style.set_table_styles(
-                                [{'selector': 'table',
-                                    'props': [('border', '1px solid black')]},
-                                {'selector': 'td',
-                                    'props': [('border', '1px solid black'), ('white-space', 'nowrap')]},
-                                {'selector': 'th',
-                                    'props': [('border', '1px solid black'), ('white-space', 'nowrap')]}]
-                            ).set_properties(**{'text-align': 'center'}).hide(axis='index')
-
-                            # Exibir o DataFrame no Streamlit
-                            st.dataframe(styled_df, use_container_width=True, hide_index=True)
-
-                        # Reset the form fields
-                        st.session_state.reset_form = True
-
-                except ValueError as e:
-                    st.error(f"Ocorreu um erro ao processar os dados: {e}")
-                except Exception as e:
-                    st.error(f"Ocorreu um erro inesperado: {e}")
+                with execucao.etapa("sugestao_prazo"):
+                    sugerir_prazo(valor, taxa_juros, escolha, margem, parcela_maxima)
+            return
+
+        # Adicionar espaço vazio na col2
+        with col2, execucao.etapa("renderizacao_resultado"):
+            st.write("")
+            st.write("")
+            st.write("")
+            st.markdown(f'<p style="color: #7CB26E;">Valor solicitado: R$ {valor:,.2f}</p>', unsafe_allow_html=True)
+            st.markdown(f'<p style="color: #7CB26E;">Taxa de Juros: {taxa_juros}%</p>', unsafe_allow_html=True)
+            st.markdown(f'<p style="color: #7CB26E;">Quantidade de parcelas: {parcelas}</p>', unsafe_allow_html=True)
+
+            st.dataframe(
+                {
+                    "Número da Parcela": list(range(1, parcelas + 1)),
+                    "Data de Vencimento": [data_venc.date() for data_venc in datas_vencimento],
+                    "Valor da Parcela": [valor_prestacao_com_iof] * parcelas,
+                },
+                column_config=COLUNAS_PARCELAS,
+                use_container_width=True,
+                hide_index=True,
+            )
+
+            if st.toggle("Ver cronograma completo", key='ver_cronograma'):
+                with execucao.etapa("cronograma"):
+                    exibir_cronograma(cotacao)
+
+    except ValueError as e:
+        st.error(f"Ocorreu um erro ao processar os dados: {e}")
+    except Exception as e:
+        st.error(f"Ocorreu um erro inesperado: {e}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,250 @@
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+CAMINHO_MARGENS = os.environ.get("MARGENS_ARQUIVO", "Planilha/margens.xlsx")
+BACKEND = os.environ.get("MARGENS_BACKEND", "memoria")
+
+# Índice imutável: trocado por inteiro a cada recarga, nunca alterado no lugar
+Indice = namedtuple("Indice", ["registros", "assinatura", "hash"])
+
+# Um registro por CPF, compartilhado por todas as sessões: as sessões guardam só o CPF
+RegistroMargem = namedtuple("RegistroMargem", ["cpf2", "nome", "empresa", "margem", "parcela_maxima"])
+
+_indice = None
+_lock = threading.Lock()
+
+_observador = None
+_observado = None
+_agendamento = None
+_lock_observador = threading.Lock()
+ESPERA_OBSERVADOR = 1.0
+
+_estado = {"caminho": None, "ultima_recarga": None, "linhas": 0, "duracao_s": None, "erro": None}
+
+
+def assinatura_arquivo(caminho):
+    info = os.stat(caminho)
+    return (os.path.abspath(caminho), info.st_mtime_ns, info.st_size)
+
+
+def hash_arquivo(caminho):
+    h = hashlib.sha1()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def caminho_snapshot(caminho):
+    return os.path.splitext(caminho)[0] + ".parquet"
+
+
+def _esquema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("cpf2", pa.string()),
+        ("Nome", pa.string()),
+        ("Empresa", pa.string()),
+        ("Margem", pa.float64()),
+        ("Parcela Maxima", pa.float64()),
+    ])
+
+
+def _tabelas(caminho, rejeitos=None, resumo=None):
+    import pyarrow as pa
+    import ingestao
+
+    esquema = _esquema()
+    for bloco in ingestao.ler_margens(caminho, rejeitos=rejeitos, resumo=resumo):
+        yield pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False)
+
+
+def ler_planilha(caminho):
+    import pyarrow as pa
+
+    tabelas = list(_tabelas(caminho))
+    return pa.concat_tables(tabelas) if tabelas else _esquema().empty_table()
+
+
+def compilar_snapshot(caminho=CAMINHO_MARGENS, destino=None, hash_origem=None, rejeitos=None, resumo=None):
+    import pyarrow.parquet as pq
+
+    destino = destino or caminho_snapshot(caminho)
+    hash_origem = hash_origem or hash_arquivo(caminho)
+    esquema = _esquema().with_metadata({"origem_sha1": hash_origem})
+    # Grava bloco a bloco em arquivo temporário e troca de uma vez para não expor snapshot pela metade
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    try:
+        with pq.ParquetWriter(temporario, esquema) as escritor:
+            for tabela in _tabelas(caminho, rejeitos, resumo):
+                escritor.write_table(tabela.replace_schema_metadata(esquema.metadata))
+        os.replace(temporario, destino)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return pq.read_table(destino, memory_map=True)
+
+
+def ler_snapshot(destino, hash_origem):
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(destino):
+        return None
+    metadados = pq.read_schema(destino).metadata or {}
+    if metadados.get(b"origem_sha1", b"").decode() != hash_origem:
+        return None
+    return pq.read_table(destino, memory_map=True)
+
+
+def carregar_tabela(caminho, hash_origem):
+    destino = caminho_snapshot(caminho)
+    tabela = ler_snapshot(destino, hash_origem)
+    if tabela is not None:
+        return tabela
+    try:
+        return compilar_snapshot(caminho, destino, hash_origem)
+    except OSError:
+        # Diretório somente leitura: segue com a planilha sem gravar o snapshot
+        return ler_planilha(caminho)
+
+
+def montar_registros(tabela):
+    registros = {}
+    empresas = {}
+    colunas = (tabela.column(nome).to_pylist() for nome in ("cpf2", "Nome", "Empresa", "Margem", "Parcela Maxima"))
+    # Mantém a primeira ocorrência de cada CPF, como a busca linear fazia
+    for cpf, nome, empresa, margem, parcela_maxima in zip(*colunas):
+        if cpf not in registros:
+            # Poucas empresas para muitos funcionários: uma string por empresa
+            empresa = empresas.setdefault(empresa, empresa)
+            registros[cpf] = RegistroMargem(cpf, nome, empresa, float(margem), float(parcela_maxima))
+    return registros
+
+
+def recarregar(caminho=None):
+    global _indice
+    caminho = caminho or CAMINHO_MARGENS
+    with _lock:
+        assinatura = assinatura_arquivo(caminho)
+        indice = _indice
+        if indice is not None and indice.assinatura == assinatura:
+            return indice
+        inicio = time.perf_counter()
+        hash_atual = hash_arquivo(caminho)
+        if indice is not None and indice.assinatura[0] == assinatura[0] and indice.hash == hash_atual:
+            # Arquivo tocado sem mudança de conteúdo: reaproveita o índice
+            novo = indice._replace(assinatura=assinatura)
+        else:
+            novo = Indice(montar_registros(carregar_tabela(caminho, hash_atual)), assinatura, hash_atual)
+        # Troca atômica: quem já pegou o índice antigo segue com ele, ninguém vê um pela metade
+        _indice = novo
+        _estado.update(
+            caminho=assinatura[0],
+            ultima_recarga=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            linhas=len(novo.registros),
+            duracao_s=round(time.perf_counter() - inicio, 3),
+            erro=None,
+        )
+        return novo
+
+
+def obter_indice(caminho=None):
+    caminho = caminho or CAMINHO_MARGENS
+    indice = _indice
+    if indice is not None and indice.assinatura[0] == os.path.abspath(caminho):
+        # Com o observador ativo a recarga acontece em segundo plano; a requisição nunca espera por ela
+        if _observado == indice.assinatura[0] or indice.assinatura == assinatura_arquivo(caminho):
+            return indice
+    return recarregar(caminho)
+
+
+def _recarregar_em_segundo_plano(caminho):
+    try:
+        recarregar(caminho)
+    except Exception as e:
+        # Arquivo ainda sendo copiado ou inválido: mantém o índice atual até o próximo evento
+        _estado["erro"] = f"{type(e).__name__}: {e}"
+
+
+def _agendar_recarga(caminho):
+    global _agendamento
+    with _lock_observador:
+        if _agendamento is not None:
+            _agendamento.cancel()
+        # Uma cópia gera vários eventos seguidos; recarrega uma vez quando o arquivo assentar
+        _agendamento = threading.Timer(ESPERA_OBSERVADOR, _recarregar_em_segundo_plano, args=(caminho,))
+        _agendamento.daemon = True
+        _agendamento.start()
+
+
+def iniciar_observador(caminho=None):
+    global _observador, _observado
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    caminho = os.path.abspath(caminho or CAMINHO_MARGENS)
+
+    class TratadorMargens(FileSystemEventHandler):
+        def on_any_event(self, evento):
+            if evento.event_type not in ("created", "modified", "moved"):
+                return
+            caminhos = {os.path.abspath(evento.src_path), os.path.abspath(getattr(evento, "dest_path", "") or "")}
+            if caminho in caminhos:
+                _agendar_recarga(caminho)
+
+    with _lock_observador:
+        if _observador is not None:
+            return _observador
+        observador = Observer()
+        observador.daemon = True
+        observador.schedule(TratadorMargens(), os.path.dirname(caminho))
+        observador.start()
+        _observador, _observado = observador, caminho
+    threading.Thread(target=_recarregar_em_segundo_plano, args=(caminho,), name="margens-carga", daemon=True).start()
+    return observador
+
+
+def estado_recarga():
+    return dict(_estado, observando=_observado)
+
+
+def cpf_valido(cpf):
+    if len(cpf) != 11 or not cpf.isdigit() or cpf == cpf[0] * 11:
+        return False
+    digitos = [int(d) for d in cpf]
+    for posicao in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(posicao + 1, 1, -1)))
+        if soma * 10 % 11 % 10 != digitos[posicao]:
+            return False
+    return True
+
+
+def buscar_cpf(cpf, caminho=None):
+    if BACKEND == "sqlite":
+        import margens_sqlite
+
+        # Dígitos verificadores errados (erro de digitação, varredura de CPFs) nem chegam ao banco;
+        # no índice em memória o próprio dict já responde mais rápido que a conferência
+        if not cpf_valido(cpf):
+            return None
+        return margens_sqlite.buscar_cpf(cpf)
+    return obter_indice(caminho).registros.get(cpf)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compila a planilha de margens (xlsx ou csv) em um snapshot Parquet.")
+    parser.add_argument("origem", nargs="?", default=CAMINHO_MARGENS)
+    parser.add_argument("--destino")
+    parser.add_argument("--rejeitos", help="arquivo CSV com as linhas rejeitadas e o motivo")
+    args = parser.parse_args()
+    resumo = {}
+    tabela = compilar_snapshot(args.origem, args.destino, rejeitos=args.rejeitos, resumo=resumo)
+    print(f"{tabela.num_rows} linhas gravadas em {args.destino or caminho_snapshot(args.origem)}"
+          f" ({resumo['rejeitadas']} rejeitadas)")
@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import base_margens
+import calculos
+import calculos_vetorizados
+import tabela_coeficientes
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_BASES = os.path.join(DIRETORIO, ".benchmark")
+TAMANHOS = (3711, 100_000, 1_000_000)
+TOLERANCIA_RELATIVA = 1e-9
+EMPRESAS = ("Jk Exclusive", "QUALITY MAX SERVICOS EM GESTAO E ADMINISTRACAO", "QUALITYMAX SERVICOS E TECNOLOGIA - EIRELI")
+
+
+def gerar_cpfs(quantidade, rng):
+    digitos = rng.integers(0, 10, size=(quantidade, 9))
+    d1 = (digitos @ np.arange(10, 1, -1)) * 10 % 11 % 10
+    d2 = (np.column_stack([digitos, d1]) @ np.arange(11, 1, -1)) * 10 % 11 % 10
+    todos = np.column_stack([digitos, d1, d2]).astype(np.uint8) + ord("0")
+    return todos.view("S11").ravel().astype(str)
+
+
+def gerar_base(linhas, diretorio=DIRETORIO_BASES):
+    from openpyxl import Workbook
+
+    caminho = os.path.join(diretorio, f"margens_{linhas}.xlsx")
+    if os.path.exists(caminho):
+        return caminho
+    os.makedirs(diretorio, exist_ok=True)
+    rng = np.random.default_rng(linhas)
+    cpfs = gerar_cpfs(linhas, rng)
+    margens = np.round(rng.uniform(0, 5000, linhas), 2)
+    parcelas = np.round(margens * rng.uniform(0.2, 0.5, linhas), 2)
+    empresas = rng.integers(0, len(EMPRESAS), linhas)
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet()
+    planilha.append(["cpf2", "Nome", "Empresa", "Margem", "Parcela Maxima"])
+    for i in range(linhas):
+        planilha.append([cpfs[i], f"Funcionario {i}", EMPRESAS[empresas[i]], float(margens[i]), float(parcelas[i])])
+    temporario = caminho + ".tmp"
+    livro.save(temporario)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def cronometrar(funcao, repeticoes=1):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def cpfs_da_base(caminho, quantidade=1000):
+    registros = base_margens.obter_indice(caminho).registros
+    return list(registros)[:quantidade]
+
+
+def medir_busca(caminho, linhas, metricas):
+    import app
+
+    snapshot = base_margens.caminho_snapshot(caminho)
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+    base_margens.CAMINHO_MARGENS = caminho
+
+    # Fria sem snapshot: parse da planilha + compilação do Parquet
+    base_margens._indice = None
+    metricas[f"busca_fria_xlsx[{linhas}]"] = cronometrar(lambda: app.carregar_dados_cpf("52998224725"))
+    cpfs = cpfs_da_base(caminho)
+    cpf = cpfs[0]
+
+    # Fria com snapshot válido: só o mapeamento do Parquet e a montagem do índice
+    def fria_snapshot():
+        base_margens._indice = None
+        app.carregar_dados_cpf(cpf)
+
+    metricas[f"busca_fria_snapshot[{linhas}]"] = cronometrar(fria_snapshot, 3)
+
+    def quente():
+        for numero in cpfs:
+            app.carregar_dados_cpf(numero)
+
+    metricas[f"busca_quente[{linhas}]"] = cronometrar(quente, 5) / len(cpfs)
+
+    # CPFs válidos que não estão na base (semente diferente da usada para gerá-la)
+    ausentes = gerar_cpfs(len(cpfs), np.random.default_rng(-linhas % 2**32))
+
+    def ausente():
+        for numero in ausentes:
+            app.carregar_dados_cpf(numero)
+
+    metricas[f"busca_ausente[{linhas}]"] = cronometrar(ausente, 5) / len(ausentes)
+
+
+def medir_calculos(metricas):
+    data = calculos.data_do_dia()
+
+    def cadeia():
+        for parcelas in range(1, 121):
+            calculos.calcular_cotacao(1000.0, 3.5, parcelas, 'Empréstimo', data)
+
+    def cadeia_fria():
+        calculos.cronograma.cache_clear()
+        calculos.fatores_desconto.cache_clear()
+        cadeia()
+
+    metricas["cadeia_1_120_fria"] = cronometrar(cadeia_fria, 5)
+    metricas["cadeia_1_120_quente"] = cronometrar(cadeia, 5)
+
+    def cadeia_tabela():
+        for parcelas in range(1, 121):
+            tabela_coeficientes.calcular_cotacao(1000.0, 3.5, parcelas, 'Empréstimo', data)
+
+    cadeia_tabela()
+    metricas["cadeia_1_120_tabela"] = cronometrar(cadeia_tabela, 5)
+    metricas["motor_vetorizado_1_120"] = cronometrar(
+        lambda: calculos_vetorizados.simular(1000.0, 3.5, np.arange(1, 121), 'Empréstimo', data), 5)
+
+
+def conferir_motor_vetorizado():
+    # O motor vetorizado precisa bater com a cadeia escalar antes de medir qualquer coisa
+    rng = np.random.default_rng(0)
+    quantidade = 500
+    valores = rng.uniform(0, 50_000, quantidade)
+    taxas = rng.choice([0.0, 0.99, 1.99, 3.5, 5.0, 9.9], quantidade)
+    parcelas = rng.integers(1, 121, quantidade)
+    escolhas = rng.choice(['Empréstimo', 'Antecipação Salarial'], quantidade)
+    data = calculos.data_do_dia()
+    simulacao = calculos_vetorizados.simular(valores, taxas, parcelas, escolhas, data)
+    pior = 0.0
+    for i in range(quantidade):
+        cotacao = calculos.calcular_cotacao(valores[i], taxas[i], parcelas[i], escolhas[i], data)
+        n = int(parcelas[i])
+        pares = [
+            (cotacao.coeficiente, simulacao.coeficientes[i]),
+            (cotacao.valor_prestacao_com_iof, simulacao.prestacoes_com_iof[i]),
+            (cotacao.total_iof, simulacao.iof_total[i]),
+        ]
+        pares += zip(cotacao.amortizacoes, simulacao.amortizacoes[i, :n])
+        pares += zip(cotacao.saldos_devedores, simulacao.saldos_devedores[i, :n])
+        pares += zip(cotacao.iof_diario_parcelas, simulacao.iof_parcelas[i, :n])
+        escala = max(1.0, cotacao.valor_financiado)
+        pior = max(pior, max(abs(a - b) / escala for a, b in pares))
+    if pior > TOLERANCIA_RELATIVA:
+        raise AssertionError(f"Motor vetorizado divergiu da cadeia escalar: erro relativo {pior:.3g}")
+    return pior
+
+
+def medir_script(caminho, linhas, metricas):
+    from streamlit.testing.v1 import AppTest
+
+    base_margens.CAMINHO_MARGENS = caminho
+    cpf = cpfs_da_base(caminho, 1)[0]
+
+    def buscar_e_calcular():
+        at = AppTest.from_file(os.path.join(DIRETORIO, "app.py"), default_timeout=60).run()
+        at.text_input[0].input(cpf)
+        at.button[0].click().run()
+        at.number_input(key="valor").set_value(100.0)
+        at.number_input(key="taxa_juros").set_value(3.5)
+        at.number_input(key="parcelas").set_value(12)
+        at.button[0].click().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    buscar_e_calcular()
+    metricas[f"script_buscar_calcular[{linhas}]"] = cronometrar(buscar_e_calcular, 3)
+
+
+def comparar(metricas, baseline, limite):
+    regressoes = []
+    for nome, valor in metricas.items():
+        referencia = baseline.get(nome)
+        if referencia and valor > referencia * (1 + limite / 100):
+            regressoes.append((nome, referencia, valor))
+    return regressoes
+
+
+def executar(tamanhos=TAMANHOS, script=True):
+    metricas = {}
+    erro = conferir_motor_vetorizado()
+    medir_calculos(metricas)
+    for linhas in tamanhos:
+        caminho = gerar_base(linhas)
+        medir_busca(caminho, linhas, metricas)
+        if script:
+            medir_script(caminho, linhas, metricas)
+    return {
+        "metricas": metricas,
+        "erro_motor_vetorizado": erro,
+        "ambiente": {"python": sys.version.split()[0], "plataforma": platform.platform()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede busca de CPF, cadeia de cálculo e execução do app; falha em regressões.")
+    parser.add_argument("--tamanhos", default=",".join(str(t) for t in TAMANHOS),
+                        help="linhas das bases sintéticas, separadas por vírgula")
+    parser.add_argument("--sem-script", action="store_true", help="não simula a execução do app (Buscar → Calcular)")
+    parser.add_argument("--saida", default="benchmark.json")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--limite", type=float, default=20.0, help="regressão máxima aceita, em %%")
+    args = parser.parse_args()
+
+    os.chdir(DIRETORIO)
+    resultado = executar([int(t) for t in args.tamanhos.split(",")], not args.sem_script)
+    with open(args.saida, "w") as f:
+        json.dump(resultado, f, indent=2)
+    for nome, valor in resultado["metricas"].items():
+        print(f"{nome:40s} {valor * 1000:12.3f} ms")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metricas"]
+        regressoes = comparar(resultado["metricas"], baseline, args.limite)
+        for nome, referencia, valor in regressoes:
+            print(f"REGRESSÃO {nome}: {referencia * 1000:.3f} ms -> {valor * 1000:.3f} ms")
+        if regressoes:
+            sys.exit(1)
@@ -0,0 +1,183 @@
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
+
+import pytz
+
+tz = pytz.timezone('America/Sao_Paulo')
+
+Cotacao = namedtuple("Cotacao", [
+    "datas_vencimento",
+    "dias_vencimento",
+    "dias_acumulados",
+    "coeficiente",
+    "valor_financiado",
+    "valor_prestacao",
+    "amortizacoes",
+    "saldos_devedores",
+    "iof_diario_parcelas",
+    "iof_adicional",
+    "total_iof",
+    "valor_financiado_com_iof",
+    "valor_prestacao_com_iof",
+])
+
+
+def data_do_dia(data_solicitacao=None):
+    if data_solicitacao is None:
+        data_solicitacao = datetime.now(tz)
+    if isinstance(data_solicitacao, date):
+        return datetime(data_solicitacao.year, data_solicitacao.month, data_solicitacao.day)
+    return datetime.strptime(data_solicitacao, '%d/%m/%Y')
+
+
+@lru_cache(maxsize=512)
+def cronograma(data_solicitacao, parcelas):
+    # Igual para todos os usuários no mesmo dia. Primeiro vencimento no dia 10 do mês seguinte,
+    # ou do outro mês se a solicitação passar do dia 10
+    meses = 1 if data_solicitacao.day <= 10 else 2
+    ano = data_solicitacao.year + (data_solicitacao.month - 1 + meses) // 12
+    mes = (data_solicitacao.month - 1 + meses) % 12 + 1
+    primeira_parcela = datetime(year=ano, month=mes, day=10)
+    datas_vencimento = [primeira_parcela]
+    for i in range(1, parcelas):
+        mes = (primeira_parcela.month + i - 1) % 12 + 1
+        ano = primeira_parcela.year + (primeira_parcela.month + i - 1) // 12
+        datas_vencimento.append(datetime(year=ano, month=mes, day=10))
+    dias_vencimento, dias_acumulados = calcular_dias_vencimento(datas_vencimento, data_solicitacao)
+    return tuple(datas_vencimento), tuple(dias_vencimento), tuple(dias_acumulados)
+
+
+@lru_cache(maxsize=2048)
+def fatores_desconto(data_solicitacao, parcelas, taxa_juros):
+    _, _, dias_acumulados = cronograma(data_solicitacao, parcelas)
+    return tuple(calcular_fatores(taxa_juros, dias_acumulados))
+
+
+def calcular_datas_vencimento(data_solicitacao, parcelas):
+    return list(cronograma(data_do_dia(data_solicitacao), parcelas)[0])
+
+
+def calcular_dias_vencimento(datas_vencimento, data_solicitacao):
+    dias_vencimento = []
+    dias_acumulados = []
+    for i, data_venc in enumerate(datas_vencimento):
+        if i == 0:
+            dias = (data_venc - data_solicitacao).days
+        else:
+            dias = (data_venc - datas_vencimento[i - 1]).days
+        dias_vencimento.append(dias)
+        if i == 0:
+            dias_acumulados.append(dias)
+        else:
+            dias_acumulados.append(dias_acumulados[i - 1] + dias)
+    return dias_vencimento, dias_acumulados
+
+
+def calcular_fatores(taxa_juros, dias_acumulados):
+    fatores = []
+    taxa_juros_decimal = float(taxa_juros) / 100
+    for dias in dias_acumulados:
+        fator = 1 / ((1 + taxa_juros_decimal) ** (dias / 30))
+        fatores.append(fator)
+    return fatores
+
+
+def calcular_coeficiente(fatores):
+    soma_fatores = sum(fatores)
+    coeficiente = 1 / soma_fatores
+    return coeficiente
+
+
+def calcular_valor_financiado(valor, escolha):
+    if escolha == 'Empréstimo':
+        TC = 150.29
+        Seguro = 77.70
+        valor_financiado = float(valor) + TC + Seguro
+    elif escolha == 'Antecipação Salarial':
+        TC_Antecipacao = 50.00
+        valor_financiado = float(valor) + TC_Antecipacao
+    else:
+        raise ValueError(f"Tipo de operação desconhecido: {escolha}")
+    return valor_financiado
+
+
+def calcular_taxa_juros_parcela(taxa_juros, dias_vencimento):
+    taxas_juros = []
+    taxa_juros_decimal = float(taxa_juros) / 100
+    for dias in dias_vencimento:
+        taxa_parcela = ((1 + taxa_juros_decimal) ** (dias / 30)) - 1
+        taxas_juros.append(taxa_parcela * 100)
+    return taxas_juros
+
+
+def calcular_valor_prestacao(valor_financiado, coeficiente):
+    return valor_financiado * coeficiente
+
+
+def calcular_iof_diario(amortizacoes, dias_acumulados):
+    iof_diario = []
+    for amortizacao, dias in zip(amortizacoes, dias_acumulados):
+        if dias > 365:
+            iof_parcela = amortizacao * 0.03
+        else:
+            iof_parcela = amortizacao * dias * 0.000082
+        iof_diario.append(iof_parcela)
+    return iof_diario
+
+
+def calcular_iof_adicional(valor_financiado):
+    return valor_financiado * 0.0038
+
+
+def calcular_amortizacao_e_saldo_devedor(valor_financiado, coeficiente, parcelas, taxas_juros_parcela, dias_acumulados):
+    saldo_devedor = valor_financiado
+    valor_prestacao = calcular_valor_prestacao(valor_financiado, coeficiente)
+    amortizacoes = []
+    saldos_devedores = []
+
+    for i in range(parcelas):
+        juros_parcela = saldo_devedor * (taxas_juros_parcela[i] / 100)
+        saldo_devedor += juros_parcela
+        amortizacoes.append(valor_prestacao - juros_parcela)
+        saldo_devedor -= valor_prestacao
+        saldos_devedores.append(saldo_devedor)
+
+    iof_diario_parcelas = calcular_iof_diario(amortizacoes, dias_acumulados[:parcelas])
+    return amortizacoes, saldos_devedores, iof_diario_parcelas
+
+
+def calcular_cotacao(valor, taxa_juros, parcelas, escolha, data_solicitacao=None):
+    data_solicitacao = data_do_dia(data_solicitacao)
+    parcelas = int(parcelas)
+    taxa_juros = float(taxa_juros)
+    dias_vencimento = cronograma(data_solicitacao, parcelas)[1]
+    coeficiente = calcular_coeficiente(fatores_desconto(data_solicitacao, parcelas, taxa_juros))
+    taxas_juros_parcela = calcular_taxa_juros_parcela(taxa_juros, dias_vencimento)
+    return montar_cotacao(valor, parcelas, escolha, data_solicitacao, coeficiente, taxas_juros_parcela)
+
+
+def montar_cotacao(valor, parcelas, escolha, data_solicitacao, coeficiente, taxas_juros_parcela):
+    datas_vencimento, dias_vencimento, dias_acumulados = cronograma(data_solicitacao, parcelas)
+    valor_financiado = calcular_valor_financiado(valor, escolha)
+    valor_prestacao = calcular_valor_prestacao(valor_financiado, coeficiente)
+    amortizacoes, saldos_devedores, iof_diario_parcelas = calcular_amortizacao_e_saldo_devedor(
+        valor_financiado, coeficiente, parcelas, taxas_juros_parcela, dias_acumulados)
+    iof_adicional = calcular_iof_adicional(valor_financiado)
+    total_iof = iof_adicional + sum(iof_diario_parcelas)
+    valor_financiado_com_iof = valor_financiado + total_iof
+    return Cotacao(
+        datas_vencimento=list(datas_vencimento),
+        dias_vencimento=list(dias_vencimento),
+        dias_acumulados=list(dias_acumulados),
+        coeficiente=coeficiente,
+        valor_financiado=valor_financiado,
+        valor_prestacao=valor_prestacao,
+        amortizacoes=amortizacoes,
+        saldos_devedores=saldos_devedores,
+        iof_diario_parcelas=iof_diario_parcelas,
+        iof_adicional=iof_adicional,
+        total_iof=total_iof,
+        valor_financiado_com_iof=valor_financiado_com_iof,
+        valor_prestacao_com_iof=calcular_valor_prestacao(valor_financiado_com_iof, coeficiente),
+    )
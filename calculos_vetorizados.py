@@ -0,0 +1,117 @@
+from collections import namedtuple
+
+import numpy as np
+
+import calculos
+from calculos import calcular_valor_financiado, data_do_dia
+
+Simulacao = namedtuple("Simulacao", [
+    "datas_vencimento",
+    "mascara",
+    "coeficientes",
+    "valores_financiados",
+    "prestacoes",
+    "prestacoes_com_iof",
+    "amortizacoes",
+    "saldos_devedores",
+    "iof_parcelas",
+    "iof_total",
+])
+
+
+def cronograma(data_solicitacao, parcelas):
+    # O cronograma de n parcelas é prefixo do cronograma de parcelas_max, então basta calcular o maior
+    datas_vencimento, dias_vencimento, dias_acumulados = calculos.cronograma(data_solicitacao, parcelas)
+    return list(datas_vencimento), np.array(dias_vencimento, dtype=float), np.array(dias_acumulados, dtype=float)
+
+
+def tarifas(escolhas):
+    escolhas = np.asarray(escolhas)
+    resultado = np.empty(escolhas.shape, dtype=float)
+    for escolha in np.unique(escolhas):
+        resultado[escolhas == escolha] = calcular_valor_financiado(0, str(escolha))
+    return resultado
+
+
+def simular(valores, taxas_juros, parcelas, escolhas, data_solicitacao=None):
+    valores, taxas_juros, parcelas, escolhas = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(valores, dtype=float)),
+        np.atleast_1d(np.asarray(taxas_juros, dtype=float)),
+        np.atleast_1d(np.asarray(parcelas, dtype=int)),
+        np.atleast_1d(np.asarray(escolhas)),
+    )
+    if parcelas.min() < 1:
+        raise ValueError("A quantidade de parcelas deve ser no mínimo 1.")
+
+    data_solicitacao = data_do_dia(data_solicitacao)
+    datas_vencimento, dias_vencimento, dias_acumulados = cronograma(data_solicitacao, int(parcelas.max()))
+    mascara = np.arange(len(dias_acumulados)) < parcelas[:, None]
+
+    base = 1 + taxas_juros[:, None] / 100
+    fatores = base ** (-dias_acumulados / 30)
+    coeficientes = 1 / np.where(mascara, fatores, 0).sum(axis=1)
+    taxas_parcela = base ** (dias_vencimento / 30) - 1
+
+    valores_financiados = valores + tarifas(escolhas)
+    prestacoes = valores_financiados * coeficientes
+
+    # Recorrência do saldo parcela a parcela, vetorizada sobre os cenários
+    amortizacoes = np.empty_like(fatores)
+    saldos = np.empty_like(fatores)
+    saldo = valores_financiados.copy()
+    for i in range(fatores.shape[1]):
+        juros = saldo * taxas_parcela[:, i]
+        saldo = saldo + juros
+        amortizacoes[:, i] = prestacoes - juros
+        saldo = saldo - prestacoes
+        saldos[:, i] = saldo
+    aliquotas = np.where(dias_acumulados > 365, 0.03, dias_acumulados * 0.000082)
+    iof_parcelas = amortizacoes * aliquotas
+
+    amortizacoes = np.where(mascara, amortizacoes, np.nan)
+    saldos = np.where(mascara, saldos, np.nan)
+    iof_parcelas = np.where(mascara, iof_parcelas, np.nan)
+    iof_total = valores_financiados * 0.0038 + np.nansum(iof_parcelas, axis=1)
+    prestacoes_com_iof = (valores_financiados + iof_total) * coeficientes
+
+    return Simulacao(
+        datas_vencimento=datas_vencimento,
+        mascara=mascara,
+        coeficientes=coeficientes,
+        valores_financiados=valores_financiados,
+        prestacoes=prestacoes,
+        prestacoes_com_iof=prestacoes_com_iof,
+        amortizacoes=amortizacoes,
+        saldos_devedores=saldos,
+        iof_parcelas=iof_parcelas,
+        iof_total=iof_total,
+    )
+
+
+MAX_PARCELAS = 120
+
+TabelaPrazos = namedtuple("TabelaPrazos", ["parcelas", "tarifa", "fatores"])
+
+
+def tabela_prazos(taxa_juros, escolha, parcelas_max=MAX_PARCELAS, data_solicitacao=None):
+    # A prestação com IOF é linear no valor financiado: prestação = valor_financiado * fator(parcelas),
+    # então uma única simulação de 1..parcelas_max resolve qualquer valor ou limite de parcela
+    parcelas = np.arange(1, parcelas_max + 1)
+    simulacao = simular(0.0, taxa_juros, parcelas, escolha, data_solicitacao)
+    tarifa = float(simulacao.valores_financiados[0])
+    return TabelaPrazos(parcelas, tarifa, simulacao.prestacoes_com_iof / simulacao.valores_financiados)
+
+
+def valores_maximos(tabela, parcela_maxima, limite_valor):
+    valores = parcela_maxima / tabela.fatores - tabela.tarifa
+    # Arredonda para baixo em centavos, com folga para a conferência da cadeia escalar
+    valores = np.floor(valores * 100 - 1e-6) / 100
+    valores = np.clip(valores, 0.0, limite_valor)
+    return valores, (valores + tabela.tarifa) * tabela.fatores
+
+
+def prazo_minimo(tabela, valor, parcela_maxima):
+    cabe = np.flatnonzero((valor + tabela.tarifa) * tabela.fatores <= parcela_maxima)
+    if len(cabe) == 0:
+        return None
+    return int(tabela.parcelas[cabe[0]])
@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+import base_margens
+import instrumentacao
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def pedido_cotacao(rng):
+    return {"valor": round(rng.uniform(100, 20_000), 2), "taxa_juros": rng.choice([1.99, 2.5, 3.5, 4.99]),
+            "parcelas": rng.randint(1, 120), "escolha": 'Empréstimo'}
+
+
+def montar_requisicoes(url, cpfs, lote, rng):
+    if cpfs and rng.random() < 0.5:
+        return f"{url}/cpf/{rng.choice(cpfs)}", "GET", None
+    corpo = [pedido_cotacao(rng) for _ in range(lote)] if lote > 1 else pedido_cotacao(rng)
+    return f"{url}/quote", "POST", json.dumps(corpo)
+
+
+async def disparar(url, cpfs, total, concorrencia, lote, semente=0):
+    rng = random.Random(semente)
+    cliente = AsyncHTTPClient(max_clients=concorrencia)
+    requisicoes = [montar_requisicoes(url, cpfs, lote, rng) for _ in range(total)]
+    latencias = {"cpf": [], "quote": []}
+    erros = 0
+    proxima = iter(requisicoes)
+
+    async def trabalhador():
+        nonlocal erros
+        for endereco, metodo, corpo in proxima:
+            inicio = time.perf_counter()
+            try:
+                await cliente.fetch(endereco, method=metodo, body=corpo)
+            except HTTPClientError as e:
+                if e.code != 404:
+                    erros += 1
+            latencias["cpf" if "/cpf/" in endereco else "quote"].append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+    cliente.close()
+
+    relatorio = {"requisicoes": total, "concorrencia": concorrencia, "lote": lote, "erros": erros,
+                 "duracao_s": round(duracao, 3), "rps": round(total / duracao, 1)}
+    for rota, valores in latencias.items():
+        if valores:
+            valores.sort()
+            relatorio[rota] = {"requisicoes": len(valores),
+                               "p50_ms": round(instrumentacao.percentil(valores, 0.5) * 1000, 3),
+                               "p99_ms": round(instrumentacao.percentil(valores, 0.99) * 1000, 3)}
+    return relatorio
+
+
+def subir_servidor(porta):
+    processo = subprocess.Popen([sys.executable, os.path.join(DIRETORIO, "api.py"), "--porta", str(porta), "--sem-observador"],
+                                cwd=DIRETORIO, stdout=subprocess.DEVNULL)
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{porta}/quote", timeout=1)
+        except urllib.error.HTTPError:
+            return processo
+        except OSError:
+            time.sleep(0.2)
+    processo.kill()
+    raise RuntimeError("A API não respondeu a tempo")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga local da API: requisições por segundo e latência p99.")
+    parser.add_argument("--url", help="API já em execução; se omitido, sobe uma instância local")
+    parser.add_argument("--porta", type=int, default=8599)
+    parser.add_argument("--requisicoes", type=int, default=5000)
+    parser.add_argument("--concorrencia", type=int, default=50)
+    parser.add_argument("--lote", type=int, default=1, help="cotações por chamada de /quote")
+    parser.add_argument("--saida", help="grava o relatório em JSON")
+    args = parser.parse_args()
+
+    cpfs = list(base_margens.obter_indice().registros)[:1000] if base_margens.BACKEND == "memoria" else []
+    processo = None if args.url else subir_servidor(args.porta)
+    try:
+        relatorio = asyncio.run(disparar(args.url or f"http://127.0.0.1:{args.porta}", cpfs, args.requisicoes,
+                                         args.concorrencia, args.lote))
+    finally:
+        if processo:
+            processo.terminate()
+            processo.wait()
+    print(json.dumps(relatorio, indent=2, ensure_ascii=False))
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
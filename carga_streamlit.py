@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import base_margens
+import benchmark
+import instrumentacao
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# O AppTest usa um Runtime global por execução: reruns simultâneos no mesmo processo se atropelam.
+# As sessões ficam vivas ao mesmo tempo e disputam esta trava, como os scripts disputam o GIL num pod;
+# a latência medida inclui a espera na fila.
+_vez = threading.Lock()
+
+
+def rss_atual_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return pico_rss_mb()
+
+
+def pico_rss_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB, macOS em bytes
+    return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+
+def sessao(cpf, rodadas, semente, latencias, execucoes, lock):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(semente)
+    tempos = []
+    tempos_execucao = []
+
+    def rodar(elemento):
+        inicio = time.perf_counter()
+        with _vez:
+            inicio_execucao = time.perf_counter()
+            elemento.run()
+            tempos_execucao.append(time.perf_counter() - inicio_execucao)
+        tempos.append(time.perf_counter() - inicio)
+
+    at = AppTest.from_file(os.path.join(DIRETORIO, "app.py"), default_timeout=120)
+    rodar(at)
+    at.text_input[0].input(cpf)
+    rodar(at.button[0].click())
+    for _ in range(rodadas):
+        at.number_input(key="valor").set_value(round(rng.uniform(50, 500), 2))
+        at.number_input(key="taxa_juros").set_value(rng.choice([1.99, 2.5, 3.5]))
+        at.number_input(key="parcelas").set_value(rng.randint(6, 48))
+        rodar(at.button[0].click())
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    with lock:
+        latencias.extend(tempos)
+        execucoes.extend(tempos_execucao)
+    # Devolve a sessão para que ela siga viva na medição de memória
+    return at
+
+
+def executar(linhas, sessoes, rodadas):
+    caminho = benchmark.gerar_base(linhas)
+    base_margens.CAMINHO_MARGENS = caminho
+    cpfs = benchmark.cpfs_da_base(caminho, sessoes)
+
+    # Uma sessão de aquecimento: importações, cache de recursos e índice ficam fora da conta
+    sessao(cpfs[0], 1, 0, [], [], threading.Lock())
+    rss_inicial = rss_atual_mb()
+
+    latencias = []
+    execucoes = []
+    lock = threading.Lock()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessoes) as executor:
+        ativas = list(executor.map(lambda i: sessao(cpfs[i % len(cpfs)], rodadas, i, latencias, execucoes, lock), range(sessoes)))
+    duracao = time.perf_counter() - inicio
+    rss_final = rss_atual_mb()
+
+    latencias.sort()
+    execucoes.sort()
+    relatorio = {
+        "linhas": linhas,
+        "sessoes": len(ativas),
+        "reruns": len(latencias),
+        "duracao_s": round(duracao, 3),
+        "reruns_por_s": round(len(latencias) / duracao, 1),
+        "rerun_p50_ms": round(instrumentacao.percentil(latencias, 0.5) * 1000, 3),
+        "rerun_p95_ms": round(instrumentacao.percentil(latencias, 0.95) * 1000, 3),
+        "rerun_p99_ms": round(instrumentacao.percentil(latencias, 0.99) * 1000, 3),
+        # Tempo do rerun em si, sem a espera pelas outras sessões
+        "execucao_p50_ms": round(instrumentacao.percentil(execucoes, 0.5) * 1000, 3),
+        "execucao_p99_ms": round(instrumentacao.percentil(execucoes, 0.99) * 1000, 3),
+        "rss_inicial_mb": round(rss_inicial, 1),
+        "rss_final_mb": round(rss_final, 1),
+        "pico_rss_mb": round(pico_rss_mb(), 1),
+        "memoria_por_sessao_mb": round((rss_final - rss_inicial) / len(ativas), 3),
+    }
+    return relatorio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simula sessões simultâneas no app (CPF → Calcular) e mede latência e memória.")
+    parser.add_argument("--sessoes", type=int, default=20)
+    parser.add_argument("--rodadas", type=int, default=5, help="cliques em Calcular por sessão")
+    parser.add_argument("--linhas", type=int, default=100_000, help="tamanho da base sintética de margens")
+    parser.add_argument("--saida", help="grava o relatório em JSON")
+    parser.add_argument("--baseline", help="relatório anterior para comparação")
+    parser.add_argument("--limite", type=float, default=20.0, help="regressão máxima aceita, em %%")
+    args = parser.parse_args()
+
+    os.chdir(DIRETORIO)
+    relatorio = executar(args.linhas, args.sessoes, args.rodadas)
+    print(json.dumps(relatorio, indent=2))
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(relatorio, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        metricas = ("rerun_p50_ms", "rerun_p95_ms", "rerun_p99_ms", "pico_rss_mb", "memoria_por_sessao_mb")
+        regressoes = benchmark.comparar({nome: relatorio[nome] for nome in metricas}, baseline, args.limite)
+        for nome, referencia, valor in regressoes:
+            print(f"REGRESSÃO {nome}: {referencia} -> {valor}")
+        if regressoes:
+            sys.exit(1)
@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+
+_MASCARA = (1 << 64) - 1
+
+
+def _misturar(x):
+    # splitmix64: espalha os bits de CPFs vizinhos; a versão em numpy precisa dar o mesmo resultado
+    x = (x + 0x9E3779B97F4A7C15) & _MASCARA
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASCARA
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASCARA
+    return x ^ (x >> 31)
+
+
+def _misturar_vetor(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class FiltroBloom:
+    __slots__ = ("bits", "tamanho", "funcoes")
+
+    def __init__(self, bits, tamanho, funcoes):
+        self.bits = bits
+        self.tamanho = tamanho
+        self.funcoes = funcoes
+
+    @classmethod
+    def de_cpfs(cls, cpfs, taxa_falsos=0.01):
+        chaves = np.fromiter((int(cpf) for cpf in cpfs), dtype=np.uint64)
+        quantidade = max(len(chaves), 1)
+        tamanho = max(64, math.ceil(-quantidade * math.log(taxa_falsos) / math.log(2) ** 2))
+        funcoes = max(1, round(tamanho / quantidade * math.log(2)))
+        marcados = np.zeros(tamanho, dtype=bool)
+        h1 = _misturar_vetor(chaves)
+        h2 = _misturar_vetor(h1) | np.uint64(1)
+        for i in range(funcoes):
+            marcados[(h1 + np.uint64(i) * h2) % np.uint64(tamanho)] = True
+        return cls(np.packbits(marcados, bitorder="little").tobytes(), tamanho, funcoes)
+
+    def __contains__(self, cpf):
+        h1 = _misturar(int(cpf))
+        h2 = _misturar(h1) | 1
+        for i in range(self.funcoes):
+            posicao = ((h1 + i * h2) & _MASCARA) % self.tamanho
+            if not self.bits[posicao >> 3] >> (posicao & 7) & 1:
+                return False
+        return True
@@ -0,0 +1,150 @@
+import os
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+COLUNAS = ("cpf2", "Nome", "Empresa", "Margem", "Parcela Maxima")
+COLUNAS_MOEDA = ("Margem", "Parcela Maxima")
+TAMANHO_BLOCO = 50_000
+
+
+def _chave_cabecalho(nome):
+    nome = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    return " ".join(nome.split()).lower()
+
+
+_CANONICAS = {_chave_cabecalho(coluna): coluna for coluna in COLUNAS}
+_CANONICAS["cpf"] = "cpf2"
+
+
+def normalizar_cabecalho(colunas):
+    # " Parcela Maxima " / "Parcela Máxima" / "parcela  maxima" -> "Parcela Maxima"
+    return [_CANONICAS.get(_chave_cabecalho(coluna), str(coluna).strip()) for coluna in colunas]
+
+
+def celulas_numericas(serie):
+    # O CSV chega todo como texto; no XLSX o openpyxl devolve int/float nas células numéricas
+    tipo = pd.api.types.infer_dtype(serie, skipna=True)
+    if tipo in ("integer", "floating", "mixed-integer-float", "decimal"):
+        return serie.notna()
+    if tipo not in ("mixed", "mixed-integer"):
+        return pd.Series(False, index=serie.index)
+    # Coluna mista: é número o que converte e não é texto
+    return pd.to_numeric(serie, errors="coerce").notna() & serie.str.len().isna()
+
+
+def converter_moeda(serie):
+    numerica = celulas_numericas(serie)
+    texto = serie.astype("string").str.replace("R$", "", regex=False).str.strip()
+    # Formato contábil do Excel grava zero como "-"
+    texto = texto.mask((texto == "-").fillna(False), "0")
+    formato_br = texto.str.contains(",", regex=False).fillna(False)
+    # Sem vírgula, "1.000" e "1.234.567" são separadores de milhar, não centavos; vale só para texto
+    milhar = texto.str.fullmatch(r"-?\d{1,3}(\.\d{3})+").fillna(False) & ~numerica
+    texto = texto.where(~(formato_br | milhar), texto.str.replace(".", "", regex=False))
+    texto = texto.where(~formato_br, texto.str.replace(",", ".", regex=False))
+    return pd.to_numeric(texto, errors="coerce")
+
+
+def normalizar_cpf(serie):
+    # Só a célula numérica do Excel perde os zeros à esquerda; texto curto é CPF incompleto
+    numerica = celulas_numericas(serie)
+    texto = serie.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    digitos = texto.str.replace(r"\D", "", regex=True)
+    digitos = digitos.mask(digitos == "")
+    return digitos.where(~numerica, digitos.str.zfill(11))
+
+
+def digitos_conferem(cpfs):
+    # A mesma conta de base_margens.cpf_valido, vetorizada sobre o bloco
+    completos = cpfs.str.fullmatch(r"\d{11}").fillna(False).astype(bool).to_numpy()
+    conferem = np.zeros(len(cpfs), dtype=bool)
+    if completos.any():
+        d = np.frombuffer("".join(cpfs[completos]).encode("ascii"), dtype=np.uint8).reshape(-1, 11).astype(np.int64) - ord("0")
+        d1 = (d[:, :9] @ np.arange(10, 1, -1)) * 10 % 11 % 10
+        d2 = (d[:, :10] @ np.arange(11, 1, -1)) * 10 % 11 % 10
+        repetidos = (d == d[:, :1]).all(axis=1)
+        conferem[completos] = (d[:, 9] == d1) & (d[:, 10] == d2) & ~repetidos
+    return pd.Series(conferem, index=cpfs.index)
+
+
+def _blocos_csv(caminho, tamanho_bloco):
+    yield from pd.read_csv(caminho, sep=";", dtype=str, encoding="utf-8-sig",
+                           keep_default_na=False, chunksize=tamanho_bloco)
+
+
+def _blocos_xlsx(caminho, tamanho_bloco):
+    from openpyxl import load_workbook
+
+    livro = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = livro.worksheets[0].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        bloco = []
+        for linha in linhas:
+            bloco.append(linha)
+            if len(bloco) == tamanho_bloco:
+                yield pd.DataFrame(bloco, columns=cabecalho, dtype=object)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame(bloco, columns=cabecalho, dtype=object)
+    finally:
+        livro.close()
+
+
+def ler_blocos(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    if caminho.lower().endswith(".csv"):
+        return _blocos_csv(caminho, tamanho_bloco)
+    return _blocos_xlsx(caminho, tamanho_bloco)
+
+
+def processar_bloco(bruto, primeira_linha):
+    bruto = bruto.set_axis(normalizar_cabecalho(bruto.columns), axis=1)
+    faltando = [coluna for coluna in COLUNAS if coluna not in bruto.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes na planilha de margens: {', '.join(faltando)}")
+    bruto = bruto.loc[:, list(COLUNAS)]
+    # Número da linha no arquivo, contando o cabeçalho como linha 1
+    bruto.index = pd.RangeIndex(primeira_linha, primeira_linha + len(bruto))
+    bruto = bruto[~(bruto.isna() | (bruto == "")).all(axis=1)]
+
+    bloco = pd.DataFrame({
+        "cpf2": normalizar_cpf(bruto["cpf2"]),
+        "Nome": bruto["Nome"].astype("string").str.strip(),
+        "Empresa": bruto["Empresa"].astype("string").str.strip(),
+    })
+    for coluna in COLUNAS_MOEDA:
+        bloco[coluna] = converter_moeda(bruto[coluna])
+
+    motivo = pd.Series(pd.NA, index=bloco.index, dtype="string")
+    for coluna in reversed(COLUNAS_MOEDA):
+        motivo = motivo.mask(bloco[coluna].isna(), f"{coluna} inválida")
+    motivo = motivo.mask(~digitos_conferem(bloco["cpf2"]), "CPF inválido")
+    motivo = motivo.mask(bloco["cpf2"].isna(), "CPF ausente")
+
+    invalidas = motivo.notna()
+    rejeitadas = bruto[invalidas].astype("string").assign(motivo=motivo[invalidas])
+    validas = bloco[~invalidas].fillna({"Nome": "", "Empresa": ""})
+    validas = validas.astype({"cpf2": str, "Nome": str, "Empresa": str, "Margem": float, "Parcela Maxima": float})
+    return validas.reset_index(drop=True), rejeitadas.rename_axis("linha").reset_index()
+
+
+def ler_margens(caminho, tamanho_bloco=TAMANHO_BLOCO, rejeitos=None, resumo=None):
+    if resumo is None:
+        resumo = {}
+    resumo.update(lidas=0, validas=0, rejeitadas=0)
+    if rejeitos and os.path.exists(rejeitos):
+        os.remove(rejeitos)
+
+    for bruto in ler_blocos(caminho, tamanho_bloco):
+        validas, rejeitadas = processar_bloco(bruto, resumo["lidas"] + 2)
+        resumo["lidas"] += len(bruto)
+        resumo["validas"] += len(validas)
+        resumo["rejeitadas"] += len(rejeitadas)
+        if rejeitos and len(rejeitadas):
+            rejeitadas.to_csv(rejeitos, sep=";", index=False, mode="a",
+                              header=not os.path.exists(rejeitos), encoding="utf-8")
+        yield validas
@@ -0,0 +1,101 @@
+import contextlib
+import json
+import logging
+import os
+import statistics
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+HABILITADA = os.environ.get("APP_INSTRUMENTACAO", "") not in ("", "0")
+TOKEN_DEBUG = os.environ.get("APP_DEBUG_TOKEN", "")
+
+logger = logging.getLogger("instrumentacao")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Últimas execuções do processo, para o painel de depuração
+registros = deque(maxlen=500)
+
+_NULO = contextlib.nullcontext()
+
+
+class Execucao:
+    __slots__ = ("sessao", "escopo", "inicio", "etapas")
+
+    def __init__(self, sessao, escopo="app"):
+        self.sessao = sessao
+        self.escopo = escopo
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+
+    @contextlib.contextmanager
+    def etapa(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nome] = self.etapas.get(nome, 0.0) + (time.perf_counter() - inicio) * 1000
+
+    def finalizar(self):
+        registro = {
+            "sessao": self.sessao,
+            "escopo": self.escopo,
+            "horario": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "total_ms": round((time.perf_counter() - self.inicio) * 1000, 3),
+            "etapas_ms": {nome: round(ms, 3) for nome, ms in self.etapas.items()},
+        }
+        registros.append(registro)
+        logger.info(json.dumps(registro, ensure_ascii=False))
+        return registro
+
+
+class _ExecucaoNula:
+    __slots__ = ()
+
+    def etapa(self, nome):
+        return _NULO
+
+    def finalizar(self):
+        return None
+
+
+_EXECUCAO_NULA = _ExecucaoNula()
+
+
+def iniciar(sessao, ativa=False, escopo="app"):
+    if not (HABILITADA or ativa):
+        return _EXECUCAO_NULA
+    return Execucao(sessao, escopo)
+
+
+def debug_autorizado(token):
+    return bool(TOKEN_DEBUG) and token == TOKEN_DEBUG
+
+
+def percentil(valores, p):
+    # Espera a lista já ordenada; usado pelo painel e pelos testes de carga
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def resumo_por_etapa():
+    tempos = {}
+    for registro in registros:
+        tempos.setdefault(f"total ({registro['escopo']})", []).append(registro["total_ms"])
+        for nome, ms in registro["etapas_ms"].items():
+            tempos.setdefault(nome, []).append(ms)
+    resumo = []
+    for nome, valores in tempos.items():
+        valores.sort()
+        resumo.append({
+            "etapa": nome,
+            "execucoes": len(valores),
+            "p50_ms": round(statistics.median(valores), 3),
+            "p95_ms": round(percentil(valores, 0.95), 3),
+            "max_ms": round(valores[-1], 3),
+        })
+    return resumo
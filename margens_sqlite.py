@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+
+from cachetools import TTLCache
+
+import filtro_cpf
+import ingestao
+from base_margens import RegistroMargem
+
+CAMINHO_SQLITE = os.environ.get("MARGENS_SQLITE", "Planilha/margens.db")
+TTL_AUSENTES = int(os.environ.get("MARGENS_TTL_AUSENTES", "300"))
+MAX_AUSENTES = 10_000
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS margens (
+    cpf2 TEXT NOT NULL,
+    nome TEXT,
+    empresa TEXT,
+    margem REAL,
+    parcela_maxima REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_margens_cpf2 ON margens (cpf2);
+"""
+
+UPSERT = """
+INSERT INTO margens (cpf2, nome, empresa, margem, parcela_maxima)
+SELECT cpf2, nome, empresa, margem, parcela_maxima FROM entrada
+WHERE rowid IN (SELECT min(rowid) FROM entrada GROUP BY cpf2)
+ON CONFLICT (cpf2) DO UPDATE SET
+    nome = excluded.nome,
+    empresa = excluded.empresa,
+    margem = excluded.margem,
+    parcela_maxima = excluded.parcela_maxima
+WHERE nome IS NOT excluded.nome
+    OR empresa IS NOT excluded.empresa
+    OR margem IS NOT excluded.margem
+    OR parcela_maxima IS NOT excluded.parcela_maxima
+"""
+
+REMOVER_AUSENTES = """
+DELETE FROM margens
+WHERE empresa IN (SELECT DISTINCT empresa FROM entrada)
+    AND cpf2 NOT IN (SELECT cpf2 FROM entrada)
+"""
+
+_conexoes = {}
+_filtros = {}
+_versoes = {}
+_reconstruindo = set()
+_ausentes = TTLCache(maxsize=MAX_AUSENTES, ttl=TTL_AUSENTES)
+_lock = threading.Lock()
+
+
+def conectar(caminho=CAMINHO_SQLITE):
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+
+def _conexao_leitura(caminho):
+    conexao = _conexoes.get(caminho)
+    if conexao is None:
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(caminho)
+        # Uma conexão somente leitura por processo, compartilhada entre as sessões
+        conexao = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, check_same_thread=False)
+        _conexoes[caminho] = conexao
+    return conexao
+
+
+def _reconstruir_filtro(caminho, versao):
+    try:
+        # Varre a base numa conexão própria, fora da trava: as buscas seguem enquanto isso
+        conexao = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+        try:
+            filtro = filtro_cpf.FiltroBloom.de_cpfs(linha[0] for linha in conexao.execute("SELECT cpf2 FROM margens"))
+        finally:
+            conexao.close()
+        with _lock:
+            _filtros[caminho] = (versao, filtro)
+    finally:
+        with _lock:
+            _reconstruindo.discard(caminho)
+
+
+def _filtro_atual(conexao, caminho):
+    # Chamada com _lock. data_version muda quando outra conexão (uma importação) grava no banco
+    versao = conexao.execute("PRAGMA data_version").fetchone()[0]
+    if _versoes.get(caminho) != versao:
+        _versoes[caminho] = versao
+        _ausentes.clear()
+    atual = _filtros.get(caminho)
+    if atual is not None and atual[0] == versao:
+        return atual[1]
+    if caminho not in _reconstruindo:
+        _reconstruindo.add(caminho)
+        threading.Thread(target=_reconstruir_filtro, args=(caminho, versao), name="margens-filtro", daemon=True).start()
+    # Filtro desatualizado ou ainda em construção: consulta o banco direto
+    return None
+
+
+def preparar_filtro(caminho=CAMINHO_SQLITE):
+    with _lock:
+        versao = _conexao_leitura(caminho).execute("PRAGMA data_version").fetchone()[0]
+        if caminho in _reconstruindo:
+            return
+        _reconstruindo.add(caminho)
+    _reconstruir_filtro(caminho, versao)
+
+
+def buscar_cpf(cpf, caminho=CAMINHO_SQLITE):
+    with _lock:
+        conexao = _conexao_leitura(caminho)
+        # CPFs fora da base param no filtro ou no cache de ausentes, sem consulta
+        filtro = _filtro_atual(conexao, caminho)
+        if (filtro is not None and cpf not in filtro) or (caminho, cpf) in _ausentes:
+            return None
+        linha = conexao.execute(
+            "SELECT cpf2, nome, empresa, margem, parcela_maxima FROM margens WHERE cpf2 = ?", (cpf,)
+        ).fetchone()
+        if linha is None:
+            _ausentes[caminho, cpf] = True
+            return None
+    return RegistroMargem(*linha)
+
+
+def ler_linhas(origem, rejeitos=None, resumo=None):
+    for bloco in ingestao.ler_margens(origem, rejeitos=rejeitos, resumo=resumo):
+        yield from bloco.itertuples(index=False, name=None)
+
+
+def importar(origem, caminho=CAMINHO_SQLITE, remover_ausentes=False, rejeitos=None):
+    conexao = conectar(caminho)
+    try:
+        with conexao:
+            antes = conexao.execute("SELECT count(*) FROM margens").fetchone()[0]
+            conexao.execute("CREATE TEMP TABLE entrada (cpf2 TEXT, nome TEXT, empresa TEXT, margem REAL, parcela_maxima REAL)")
+            leitura = {}
+            conexao.executemany("INSERT INTO entrada VALUES (?, ?, ?, ?, ?)", ler_linhas(origem, rejeitos, leitura))
+            alterados = conexao.execute(UPSERT).rowcount
+            removidos = conexao.execute(REMOVER_AUSENTES).rowcount if remover_ausentes else 0
+            depois = conexao.execute("SELECT count(*) FROM margens").fetchone()[0]
+            conexao.execute("DROP TABLE entrada")
+        inseridos = depois - antes + removidos
+        return {
+            "lidos": leitura["lidas"],
+            "rejeitados": leitura["rejeitadas"],
+            "inseridos": inseridos,
+            "atualizados": alterados - inseridos,
+            "removidos": removidos,
+        }
+    finally:
+        conexao.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importa margens.csv/xlsx para a base SQLite, gravando só as linhas alteradas.")
+    parser.add_argument("origem")
+    parser.add_argument("--banco", default=CAMINHO_SQLITE)
+    parser.add_argument("--rejeitos", help="arquivo CSV com as linhas rejeitadas e o motivo")
+    parser.add_argument("--remover-ausentes", action="store_true",
+                        help="remove CPFs das empresas presentes no arquivo que não constam mais nele")
+    args = parser.parse_args()
+    resumo = importar(args.origem, args.banco, args.remover_ausentes, args.rejeitos)
+    print(", ".join(f"{chave}: {valor}" for chave, valor in resumo.items()))
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import sys
+
+import base_margens
+import benchmark
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+# Chaves que o app grava na sessão; o restante é estado interno do Streamlit
+CHAVES_APP = ("cpf", "cpf_validado", "dados_cpf", "simulacao")
+
+
+def tamanho_profundo(objeto, vistos=None):
+    vistos = set() if vistos is None else vistos
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+    tamanho = sys.getsizeof(objeto)
+    if isinstance(objeto, dict):
+        tamanho += sum(tamanho_profundo(k, vistos) + tamanho_profundo(v, vistos) for k, v in objeto.items())
+    elif isinstance(objeto, (list, tuple, set, frozenset)):
+        tamanho += sum(tamanho_profundo(item, vistos) for item in objeto)
+    return tamanho
+
+
+def registros_antigos(tabela):
+    # Layout anterior: um dict de strings por CPF, copiado inteiro para cada sessão
+    nomes = tabela.column_names
+    registros = {}
+    for linha in zip(*(tabela.column(nome).to_pylist() for nome in nomes)):
+        registros.setdefault(linha[0], dict(zip(nomes, linha)))
+    return registros
+
+
+def sessao_medida(cpf, compartilhados):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(DIRETORIO, "app.py"), default_timeout=60).run()
+    at.text_input[0].input(cpf)
+    at.button[0].click().run()
+    at.number_input(key="valor").set_value(100.0)
+    at.number_input(key="taxa_juros").set_value(3.5)
+    at.number_input(key="parcelas").set_value(12)
+    at.button[0].click().run()
+    estado = {chave: at.session_state[chave] for chave in CHAVES_APP if chave in at.session_state}
+    # O que é do índice compartilhado não conta para a sessão
+    return tamanho_profundo(estado, set(compartilhados))
+
+
+def medir(linhas, sessoes):
+    caminho = benchmark.gerar_base(linhas)
+    base_margens.CAMINHO_MARGENS = caminho
+    tabela = base_margens.carregar_tabela(caminho, base_margens.hash_arquivo(caminho))
+    antigos = registros_antigos(tabela)
+    novos = base_margens.montar_registros(tabela)
+    cpf = next(iter(novos))
+
+    sessao_antes = tamanho_profundo({"cpf_validado": True, "dados_cpf": dict(antigos[cpf])})
+    sessao_depois = tamanho_profundo({"cpf": str(cpf)})
+    indice = base_margens.obter_indice(caminho)
+    compartilhados = {id(indice.registros)} | {id(r) for r in indice.registros.values()}
+    compartilhados |= {id(campo) for r in indice.registros.values() for campo in r}
+
+    relatorio = {
+        "linhas": linhas,
+        "indice_antes_bytes_por_registro": round(tamanho_profundo(antigos) / len(antigos), 1),
+        "indice_depois_bytes_por_registro": round(tamanho_profundo(novos) / len(novos), 1),
+        "sessao_antes_bytes": sessao_antes,
+        "sessao_depois_bytes": sessao_depois,
+        "sessao_app_medida_bytes": sessao_medida(cpf, compartilhados),
+        "sessoes_projetadas": sessoes,
+        "sessoes_antes_mb": round(sessao_antes * sessoes / 2**20, 2),
+        "sessoes_depois_mb": round(sessao_depois * sessoes / 2**20, 2),
+    }
+    return relatorio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contabiliza bytes por sessão e por registro do índice, antes e depois do registro compartilhado.")
+    parser.add_argument("--linhas", type=int, default=100_000, help="tamanho da base sintética de margens")
+    parser.add_argument("--sessoes", type=int, default=5000, help="sessões abertas para a projeção")
+    parser.add_argument("--saida", help="grava o relatório em JSON")
+    args = parser.parse_args()
+
+    os.chdir(DIRETORIO)
+    relatorio = medir(args.linhas, args.sessoes)
+    print(json.dumps(relatorio, indent=2))
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(relatorio, f, indent=2)
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Cada medição roda em um processo novo, como o primeiro acesso após subir um pod
+MEDIR_PRIMEIRA_RENDERIZACAO = """
+import json, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+importacao = time.perf_counter() - inicio
+at = AppTest.from_file("app.py", default_timeout=120)
+inicio = time.perf_counter()
+at.run()
+primeira = time.perf_counter() - inicio
+inicio = time.perf_counter()
+at.run()
+segunda = time.perf_counter() - inicio
+print(json.dumps({"importacao_streamlit_s": importacao, "primeira_renderizacao_s": primeira,
+                  "segunda_renderizacao_s": segunda, "erros": [e.message for e in at.exception]}))
+"""
+
+
+def executar_python(codigo, *opcoes):
+    ambiente = dict(os.environ, PYTHONPATH=DIRETORIO, APP_AQUECER="0")
+    resultado = subprocess.run([sys.executable, *opcoes, "-c", codigo], cwd=DIRETORIO, env=ambiente,
+                               capture_output=True, text=True, check=True)
+    return resultado
+
+
+def tempo_importacao(modulo):
+    codigo = f"import time; inicio = time.perf_counter(); import {modulo}; print(time.perf_counter() - inicio)"
+    return float(executar_python(codigo).stdout.strip().splitlines()[-1])
+
+
+def importacoes_mais_lentas(modulo, quantidade=10):
+    saida = executar_python(f"import {modulo}", "-X", "importtime").stderr
+    tempos = []
+    for linha in saida.splitlines():
+        achado = re.match(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)", linha)
+        # Só o app e suas importações diretas: o tempo cumulativo já inclui as dependências
+        if achado and len(achado.group(2)) <= 3:
+            tempos.append((int(achado.group(1)) / 1e6, achado.group(3)))
+    return [{"modulo": nome, "cumulativo_s": round(segundos, 4)} for segundos, nome in sorted(tempos, reverse=True)[:quantidade]]
+
+
+def medir(repeticoes=3):
+    importacao_app = [tempo_importacao("app") for _ in range(repeticoes)]
+    renderizacoes = [json.loads(executar_python(MEDIR_PRIMEIRA_RENDERIZACAO).stdout.strip().splitlines()[-1])
+                     for _ in range(repeticoes)]
+    erros = [erro for r in renderizacoes for erro in r["erros"]]
+    if erros:
+        raise RuntimeError(f"O app falhou durante a medição: {erros[0]}")
+    return {
+        "importacao_app_s": round(statistics.median(importacao_app), 4),
+        "importacao_streamlit_s": round(statistics.median(r["importacao_streamlit_s"] for r in renderizacoes), 4),
+        "primeira_renderizacao_s": round(statistics.median(r["primeira_renderizacao_s"] for r in renderizacoes), 4),
+        "segunda_renderizacao_s": round(statistics.median(r["segunda_renderizacao_s"] for r in renderizacoes), 4),
+        "pandas_importado_no_app": executar_python(
+            "import sys, app; print('pandas' in sys.modules)").stdout.strip() == "True",
+        "importacoes_mais_lentas": importacoes_mais_lentas("app"),
+        "repeticoes": repeticoes,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tempo de partida a frio do app (importação e primeira renderização).")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", help="grava o relatório em JSON")
+    args = parser.parse_args()
+
+    relatorio = medir(args.repeticoes)
+    print(json.dumps(relatorio, indent=2, ensure_ascii=False))
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+
+COLUNAS_SAIDA = ["cpf2", "parcelas", "valor_maximo", "valor_parcela"]
+
+
+def ofertas_do_bloco(cpfs, margens, parcelas_maximas, taxa_juros, escolha, parcelas_max, data_solicitacao):
+    import calculos_vetorizados
+
+    tabela = calculos_vetorizados.tabela_prazos(taxa_juros, escolha, parcelas_max, data_solicitacao)
+    # Antecipação salarial é limitada pela parcela máxima, empréstimo pela margem
+    limites = margens if escolha == 'Empréstimo' else parcelas_maximas
+    valores, prestacoes = calculos_vetorizados.valores_maximos(tabela, parcelas_maximas[:, None], limites[:, None])
+    disponiveis = valores > 0
+    linhas, colunas = np.nonzero(disponiveis)
+    return pd.DataFrame({
+        "cpf2": cpfs[linhas],
+        "parcelas": tabela.parcelas[colunas],
+        "valor_maximo": valores[disponiveis],
+        "valor_parcela": np.round(prestacoes[disponiveis], 2),
+    }, columns=COLUNAS_SAIDA)
+
+
+class _Escritor:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.parquet = caminho.lower().endswith(".parquet")
+        self._escritor = None
+        self.linhas = 0
+
+    def escrever(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+            if self._escritor is None:
+                self._escritor = pq.ParquetWriter(self.caminho, tabela.schema)
+            self._escritor.write_table(tabela)
+        else:
+            df.to_csv(self.caminho, sep=";", index=False, mode="a" if self.linhas else "w",
+                      header=not self.linhas, float_format="%.2f")
+        self.linhas += len(df)
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+
+def executar(entrada, saida, taxa_juros, escolha='Empréstimo', parcelas_max=120, workers=None,
+             tamanho_bloco=ingestao.TAMANHO_BLOCO, data_solicitacao=None):
+    workers = workers or os.cpu_count() or 1
+    if escolha != 'Empréstimo':
+        parcelas_max = 1
+    if data_solicitacao is None:
+        from calculos import data_do_dia
+
+        data_solicitacao = data_do_dia()
+
+    resumo = {}
+    vistos = set()
+    duplicados = 0
+    escritor = _Escritor(saida)
+    pendentes = deque()
+    inicio = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for bloco in ingestao.ler_margens(entrada, tamanho_bloco, resumo=resumo):
+                # Um CPF, um conjunto de ofertas: vale a primeira ocorrência, como no índice do app
+                novos = ~bloco["cpf2"].duplicated() & ~bloco["cpf2"].isin(vistos)
+                duplicados += int((~novos).sum())
+                bloco = bloco[novos]
+                vistos.update(bloco["cpf2"])
+                if bloco.empty:
+                    continue
+                pendentes.append(executor.submit(
+                    ofertas_do_bloco,
+                    bloco["cpf2"].to_numpy(),
+                    bloco["Margem"].to_numpy(),
+                    bloco["Parcela Maxima"].to_numpy(),
+                    taxa_juros, escolha, parcelas_max, data_solicitacao,
+                ))
+                # Limita os blocos em voo para manter a memória estável; grava na ordem da entrada
+                while len(pendentes) > 2 * workers:
+                    escritor.escrever(pendentes.popleft().result())
+            while pendentes:
+                escritor.escrever(pendentes.popleft().result())
+    finally:
+        escritor.fechar()
+
+    duracao = time.perf_counter() - inicio
+    linhas_por_segundo = resumo.get("validas", 0) / duracao if duracao else 0.0
+    return {
+        "cpfs": len(vistos),
+        "duplicados": duplicados,
+        "rejeitados": resumo.get("rejeitadas", 0),
+        "ofertas": escritor.linhas,
+        "workers": workers,
+        "segundos": round(duracao, 3),
+        "linhas_por_segundo": round(linhas_por_segundo, 1),
+        "linhas_por_segundo_por_core": round(linhas_por_segundo / workers, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera a pré-aprovação (valor máximo e parcela por prazo) de toda a base de margens.")
+    parser.add_argument("entrada", nargs="?", default="Planilha/margens.csv")
+    parser.add_argument("--saida", default="pre_aprovacao.csv", help="arquivo .csv ou .parquet")
+    parser.add_argument("--taxa", type=float, required=True, help="taxa de juros mensal (%%)")
+    parser.add_argument("--escolha", default='Empréstimo', choices=['Empréstimo', 'Antecipação Salarial'])
+    parser.add_argument("--max-parcelas", type=int, default=120)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--tamanho-bloco", type=int, default=ingestao.TAMANHO_BLOCO)
+    parser.add_argument("--data", help="data de solicitação (dd/mm/aaaa); padrão: hoje")
+    parser.add_argument("--relatorio", help="grava o relatório de vazão em JSON")
+    args = parser.parse_args()
+
+    relatorio = executar(args.entrada, args.saida, args.taxa, args.escolha, args.max_parcelas,
+                         args.workers, args.tamanho_bloco, args.data)
+    print(", ".join(f"{chave}: {valor}" for chave, valor in relatorio.items()))
+    if args.relatorio:
+        with open(args.relatorio, "w") as f:
+            json.dump(relatorio, f, indent=2)
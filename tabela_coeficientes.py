@@ -0,0 +1,96 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import calculos
+from calculos import data_do_dia, montar_cotacao
+
+# Taxas mensais (%) dos produtos, separadas por vírgula: pré-calculadas a cada virada de dia
+TAXAS_CONFIGURADAS = tuple(float(t) for t in os.environ.get("TAXAS_CONFIGURADAS", "").split(",") if t.strip())
+MAX_LINHAS = int(os.environ.get("TABELA_COEFICIENTES_MAX", "64"))
+MAX_PARCELAS = 120
+
+# Uma linha por (dia, taxa): coeficiente e taxa de cada parcela para os prazos de 1 a MAX_PARCELAS.
+# O cronograma de n parcelas é prefixo do de MAX_PARCELAS, então a linha serve para qualquer prazo
+LinhaTaxa = namedtuple("LinhaTaxa", ["coeficientes", "taxas_juros_parcela"])
+
+# Linhas das taxas configuradas, do dia corrente: nunca descartadas
+_configuradas = {}
+# Taxas avulsas (e datas informadas pela API): LRU limitada a MAX_LINHAS
+_linhas = OrderedDict()
+_dia = None
+_lock = threading.Lock()
+contadores = {"acertos": 0, "faltas": 0, "fora_da_tabela": 0, "descartes": 0, "reconstrucoes": 0}
+
+
+def montar_linha(data_solicitacao, taxa_juros):
+    import numpy as np
+
+    import calculos_vetorizados
+
+    _, dias_vencimento, dias_acumulados = calculos_vetorizados.cronograma(data_solicitacao, MAX_PARCELAS)
+    base = 1 + taxa_juros / 100
+    coeficientes = 1 / np.cumsum(base ** (-dias_acumulados / 30))
+    taxas_juros_parcela = (base ** (dias_vencimento / 30) - 1) * 100
+    return LinhaTaxa(tuple(coeficientes.tolist()), tuple(taxas_juros_parcela.tolist()))
+
+
+def _guardar(chave, linha):
+    _linhas[chave] = linha
+    while len(_linhas) > MAX_LINHAS:
+        _linhas.popitem(last=False)
+        contadores["descartes"] += 1
+
+
+def reconstruir(data_solicitacao=None):
+    global _dia
+    dia = data_do_dia(data_solicitacao)
+    configuradas = {taxa: montar_linha(dia, taxa) for taxa in TAXAS_CONFIGURADAS}
+    with _lock:
+        # Virada de dia: as linhas de ontem não servem mais para ninguém
+        _configuradas.clear()
+        _configuradas.update(configuradas)
+        _linhas.clear()
+        _dia = dia
+        contadores["reconstrucoes"] += 1
+
+
+def obter_linha(data_solicitacao, taxa_juros):
+    if data_solicitacao != _dia and data_solicitacao == data_do_dia():
+        reconstruir(data_solicitacao)
+    chave = (data_solicitacao, taxa_juros)
+    with _lock:
+        if data_solicitacao == _dia and taxa_juros in _configuradas:
+            contadores["acertos"] += 1
+            return _configuradas[taxa_juros]
+        linha = _linhas.get(chave)
+        if linha is not None:
+            _linhas.move_to_end(chave)
+            contadores["acertos"] += 1
+            return linha
+        contadores["faltas"] += 1
+    # Taxa fora do catálogo: calcula na hora e guarda, respeitando o limite de linhas
+    linha = montar_linha(data_solicitacao, taxa_juros)
+    with _lock:
+        _guardar(chave, linha)
+    return linha
+
+
+def calcular_cotacao(valor, taxa_juros, parcelas, escolha, data_solicitacao=None):
+    data_solicitacao = data_do_dia(data_solicitacao)
+    parcelas = int(parcelas)
+    taxa_juros = float(taxa_juros)
+    if not 1 <= parcelas <= MAX_PARCELAS:
+        with _lock:
+            contadores["fora_da_tabela"] += 1
+        return calculos.calcular_cotacao(valor, taxa_juros, parcelas, escolha, data_solicitacao)
+    linha = obter_linha(data_solicitacao, taxa_juros)
+    return montar_cotacao(valor, parcelas, escolha, data_solicitacao, linha.coeficientes[parcelas - 1],
+                          linha.taxas_juros_parcela[:parcelas])
+
+
+def estado():
+    with _lock:
+        return dict(contadores, dia=_dia.date().isoformat() if _dia else None,
+                    linhas_configuradas=len(_configuradas), linhas_avulsas=len(_linhas),
+                    max_linhas=MAX_LINHAS, taxas_configuradas=list(TAXAS_CONFIGURADAS))
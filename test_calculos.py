@@ -0,0 +1,225 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import calculos
+import calculos_vetorizados
+import tabela_coeficientes
+
+TOLERANCIA_RELATIVA = 1e-9
+
+
+@pytest.mark.parametrize("data", ["05/01/2025", "10/02/2024", "11/06/2025", "28/12/2025"])
+def test_motor_vetorizado_bate_com_a_cadeia_escalar(data):
+    rng = np.random.default_rng(sum(map(ord, data)))
+    quantidade = 300
+    valores = rng.uniform(0, 50_000, quantidade)
+    taxas = rng.choice([0.0, 0.99, 1.99, 3.5, 5.0, 9.9], quantidade)
+    parcelas = rng.integers(1, 121, quantidade)
+    escolhas = rng.choice(['Empréstimo', 'Antecipação Salarial'], quantidade)
+
+    simulacao = calculos_vetorizados.simular(valores, taxas, parcelas, escolhas, data)
+
+    for i in range(quantidade):
+        cotacao = calculos.calcular_cotacao(valores[i], taxas[i], parcelas[i], escolhas[i], data)
+        n = int(parcelas[i])
+        # Erro medido em relação ao valor financiado, a escala de todos os valores da cotação
+        escala = max(1.0, cotacao.valor_financiado)
+        assert cotacao.coeficiente == pytest.approx(simulacao.coeficientes[i], rel=TOLERANCIA_RELATIVA)
+        assert cotacao.valor_financiado == pytest.approx(simulacao.valores_financiados[i], rel=TOLERANCIA_RELATIVA)
+        assert cotacao.valor_prestacao_com_iof == pytest.approx(simulacao.prestacoes_com_iof[i], rel=TOLERANCIA_RELATIVA)
+        assert cotacao.total_iof == pytest.approx(simulacao.iof_total[i], abs=escala * TOLERANCIA_RELATIVA)
+        assert simulacao.datas_vencimento[:n] == cotacao.datas_vencimento
+        for esperado, obtido in (
+            (cotacao.amortizacoes, simulacao.amortizacoes[i, :n]),
+            (cotacao.saldos_devedores, simulacao.saldos_devedores[i, :n]),
+            (cotacao.iof_diario_parcelas, simulacao.iof_parcelas[i, :n]),
+        ):
+            assert np.abs(np.array(esperado) - obtido).max() <= escala * TOLERANCIA_RELATIVA
+        assert np.isnan(simulacao.amortizacoes[i, n:]).all()
+
+
+def test_motor_vetorizado_rejeita_prazo_zero():
+    with pytest.raises(ValueError):
+        calculos_vetorizados.simular(1000.0, 3.5, 0, 'Empréstimo', "01/01/2025")
+
+
+def cotacao_original(valor, taxa_juros, parcelas, escolha, data_solicitacao):
+    # Cadeia do app.py original, transcrita sem mudar a ordem das operações
+    data = datetime.strptime(data_solicitacao, '%d/%m/%Y')
+    meses = 1 if data.day <= 10 else 2
+    if data.month == 12:
+        primeira_parcela = data.replace(day=10, month=meses, year=data.year + 1)
+    else:
+        primeira_parcela = data.replace(day=10, month=data.month + meses)
+    datas = [primeira_parcela]
+    for i in range(1, parcelas):
+        mes = (primeira_parcela.month + i - 1) % 12 + 1
+        ano = primeira_parcela.year + (primeira_parcela.month + i - 1) // 12
+        datas.append(datetime(year=ano, month=mes, day=10))
+    dias_vencimento = [(datas[0] - data).days] + [(datas[i] - datas[i - 1]).days for i in range(1, parcelas)]
+    dias_acumulados = []
+    for i, dias in enumerate(dias_vencimento):
+        dias_acumulados.append(dias if i == 0 else dias_acumulados[i - 1] + dias)
+    taxa = float(taxa_juros) / 100
+    coeficiente = 1 / sum([1 / ((1 + taxa) ** (dias / 30)) for dias in dias_acumulados])
+    taxas_parcela = [(((1 + taxa) ** (dias / 30)) - 1) * 100 for dias in dias_vencimento]
+    valor_financiado = float(valor) + 150.29 + 77.70 if escolha == 'Empréstimo' else float(valor) + 50.00
+    saldo = valor_financiado
+    amortizacoes, saldos, iofs = [], [], []
+    for i in range(parcelas):
+        juros = saldo * (taxas_parcela[i] / 100)
+        saldo += juros
+        amortizacao = valor_financiado * coeficiente - juros
+        saldo = saldo - valor_financiado * coeficiente
+        iofs.append(amortizacao * 0.03 if dias_acumulados[i] > 365 else amortizacao * dias_acumulados[i] * 0.000082)
+        amortizacoes.append(amortizacao)
+        saldos.append(saldo)
+    total_iof = valor_financiado * 0.0038 + sum(iofs)
+    return datas, coeficiente, amortizacoes, saldos, iofs, total_iof, (valor_financiado + total_iof) * coeficiente
+
+
+@pytest.mark.parametrize("data", ["01/01/2025", "10/03/2025", "11/03/2025", "31/10/2025", "10/11/2025",
+                                  "10/12/2025", "11/12/2025", "31/12/2025", "29/02/2024"])
+def test_cadeia_compartilhada_identica_a_original(data):
+    rng = np.random.default_rng(sum(map(ord, data)))
+    for _ in range(40):
+        valor = float(rng.uniform(0, 50_000))
+        taxa = float(rng.choice([0.0, 1.99, 3.5, 9.9]))
+        parcelas = int(rng.integers(1, 121))
+        escolha = str(rng.choice(['Empréstimo', 'Antecipação Salarial']))
+        cotacao = calculos.calcular_cotacao(valor, taxa, parcelas, escolha, data)
+        datas, coeficiente, amortizacoes, saldos, iofs, total_iof, prestacao_com_iof = cotacao_original(
+            valor, taxa, parcelas, escolha, data)
+        # Bit a bit: a extração com cache não pode mudar nenhum centavo
+        assert cotacao.datas_vencimento == datas
+        assert cotacao.coeficiente == coeficiente
+        assert cotacao.amortizacoes == amortizacoes
+        assert cotacao.saldos_devedores == saldos
+        assert cotacao.iof_diario_parcelas == iofs
+        assert cotacao.total_iof == total_iof
+        assert cotacao.valor_prestacao_com_iof == prestacao_com_iof
+
+
+@pytest.mark.parametrize("dia", [11, 20, 30])
+def test_pedido_apos_dia_10_de_novembro_vence_em_janeiro(dia):
+    data = f"{dia}/11/2025"
+    # O app original calculava o mês 13 e quebrava
+    with pytest.raises(ValueError):
+        cotacao_original(1000.0, 3.5, 12, 'Empréstimo', data)
+    cotacao = calculos.calcular_cotacao(1000.0, 3.5, 12, 'Empréstimo', data)
+    assert cotacao.datas_vencimento[0] == datetime(2026, 1, 10)
+    assert cotacao.datas_vencimento[-1] == datetime(2026, 12, 10)
+    assert cotacao.dias_vencimento[0] == (datetime(2026, 1, 10) - datetime(2025, 11, dia)).days
+
+
+@pytest.fixture
+def tabela(monkeypatch):
+    monkeypatch.setattr(tabela_coeficientes, "TAXAS_CONFIGURADAS", (1.99, 3.5))
+    monkeypatch.setattr(tabela_coeficientes, "MAX_LINHAS", 8)
+    monkeypatch.setattr(tabela_coeficientes, "_configuradas", {})
+    monkeypatch.setattr(tabela_coeficientes, "_linhas", OrderedDict())
+    monkeypatch.setattr(tabela_coeficientes, "_dia", None)
+    monkeypatch.setattr(tabela_coeficientes, "contadores", dict.fromkeys(tabela_coeficientes.contadores, 0))
+    return tabela_coeficientes
+
+
+@pytest.mark.parametrize("data", ["05/01/2025", "11/11/2025", "28/12/2025"])
+def test_tabela_de_coeficientes_bate_com_a_cadeia_escalar(tabela, data):
+    tabela.reconstruir(data)
+    rng = np.random.default_rng(sum(map(ord, data)))
+    for _ in range(200):
+        valor = float(rng.uniform(0, 50_000))
+        # Taxas configuradas e avulsas passam pelo mesmo caminho de linha
+        taxa = float(rng.choice([0.0, 1.99, 2.75, 3.5, 9.9]))
+        parcelas = int(rng.integers(1, 121))
+        escolha = str(rng.choice(['Empréstimo', 'Antecipação Salarial']))
+        esperado = calculos.calcular_cotacao(valor, taxa, parcelas, escolha, data)
+        obtido = tabela.calcular_cotacao(valor, taxa, parcelas, escolha, data)
+        escala = max(1.0, esperado.valor_financiado)
+        assert obtido.datas_vencimento == esperado.datas_vencimento
+        assert obtido.dias_vencimento == esperado.dias_vencimento
+        assert obtido.coeficiente == pytest.approx(esperado.coeficiente, rel=TOLERANCIA_RELATIVA)
+        assert obtido.valor_prestacao_com_iof == pytest.approx(esperado.valor_prestacao_com_iof, rel=TOLERANCIA_RELATIVA)
+        assert obtido.total_iof == pytest.approx(esperado.total_iof, abs=escala * TOLERANCIA_RELATIVA)
+        for a, b in ((obtido.amortizacoes, esperado.amortizacoes), (obtido.saldos_devedores, esperado.saldos_devedores),
+                     (obtido.iof_diario_parcelas, esperado.iof_diario_parcelas)):
+            assert np.abs(np.array(a) - np.array(b)).max() <= escala * TOLERANCIA_RELATIVA
+
+
+def test_tabela_fora_do_prazo_usa_a_cadeia_escalar(tabela):
+    esperado = calculos.calcular_cotacao(1000.0, 3.5, 150, 'Empréstimo', "05/01/2025")
+    assert tabela.calcular_cotacao(1000.0, 3.5, 150, 'Empréstimo', "05/01/2025") == esperado
+    assert tabela.contadores["fora_da_tabela"] == 1
+
+
+def test_taxas_avulsas_nao_descartam_as_configuradas(tabela):
+    data = "05/01/2025"
+    tabela.reconstruir(data)
+    for i in range(3 * tabela.MAX_LINHAS):
+        tabela.calcular_cotacao(1000.0, 2.0 + i / 100, 12, 'Empréstimo', data)
+    assert len(tabela._linhas) == tabela.MAX_LINHAS
+    assert tabela.contadores["descartes"] == 2 * tabela.MAX_LINHAS
+
+    faltas = tabela.contadores["faltas"]
+    tabela.calcular_cotacao(1000.0, 1.99, 12, 'Empréstimo', data)
+    tabela.calcular_cotacao(1000.0, 3.5, 12, 'Empréstimo', data)
+    assert tabela.contadores["faltas"] == faltas
+
+    # A taxa avulsa mais antiga saiu da LRU e é recalculada
+    tabela.calcular_cotacao(1000.0, 2.0, 12, 'Empréstimo', data)
+    assert tabela.contadores["faltas"] == faltas + 1
+
+
+def test_virada_de_dia_reconstroi_a_tabela(tabela):
+    hoje = calculos.data_do_dia()
+    ontem = hoje - timedelta(days=1)
+    tabela.reconstruir(ontem)
+    tabela.calcular_cotacao(1000.0, 2.2, 12, 'Empréstimo', ontem)
+    assert tabela.estado()["linhas_avulsas"] == 1
+
+    # Primeira cotação do dia novo: troca as linhas configuradas e descarta as avulsas de ontem
+    cotacao = tabela.calcular_cotacao(1000.0, 1.99, 12, 'Empréstimo')
+    assert tabela._dia == hoje
+    assert tabela.contadores["reconstrucoes"] == 2
+    assert tabela.estado()["linhas_avulsas"] == 0
+    assert tabela.contadores["faltas"] == 1
+    esperado = calculos.calcular_cotacao(1000.0, 1.99, 12, 'Empréstimo', hoje)
+    assert cotacao.datas_vencimento == esperado.datas_vencimento
+    assert cotacao.valor_prestacao_com_iof == pytest.approx(esperado.valor_prestacao_com_iof, rel=TOLERANCIA_RELATIVA)
+
+
+def cabe(valor, taxa, parcelas, escolha, data, parcela_maxima):
+    return calculos.calcular_cotacao(valor, taxa, parcelas, escolha, data).valor_prestacao_com_iof <= parcela_maxima
+
+
+@pytest.mark.parametrize("data", ["05/01/2025", "11/11/2025", "28/12/2025"])
+def test_valores_maximos_e_prazo_minimo_conferem_com_a_cadeia_escalar(data):
+    rng = np.random.default_rng(sum(map(ord, data)))
+    for _ in range(10):
+        taxa = float(rng.choice([0.0, 1.99, 3.5, 9.9]))
+        escolha = str(rng.choice(['Empréstimo', 'Antecipação Salarial']))
+        parcela_maxima = round(float(rng.uniform(5, 2_000)), 2)
+        margem = round(float(rng.uniform(0, 200_000)), 2)
+        tabela = calculos_vetorizados.tabela_prazos(taxa, escolha, data_solicitacao=data)
+        valores, _ = calculos_vetorizados.valores_maximos(tabela, parcela_maxima, margem)
+        # Antecipação é sempre em uma parcela
+        prazos = range(1, len(tabela.parcelas) + 1) if escolha == 'Empréstimo' else [1]
+        for n in prazos:
+            valor = float(valores[n - 1])
+            if valor > 0:
+                assert cabe(valor, taxa, n, escolha, data, parcela_maxima)
+            # Um centavo a mais já não cabe, a menos que o teto seja a Margem
+            if valor < margem:
+                assert not cabe(valor + 0.01, taxa, n, escolha, data, parcela_maxima)
+
+        valor = round(float(rng.uniform(0, 20_000)), 2)
+        minimo = calculos_vetorizados.prazo_minimo(tabela, valor, parcela_maxima)
+        if minimo is None:
+            assert not cabe(valor, taxa, prazos[-1], escolha, data, parcela_maxima)
+        else:
+            assert cabe(valor, taxa, minimo, escolha, data, parcela_maxima)
+            if minimo > 1:
+                assert not cabe(valor, taxa, minimo - 1, escolha, data, parcela_maxima)
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+import ingestao
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("R$ -", 0.0),
+    (" - ", 0.0),
+    ("R$ 1.234,56", 1234.56),
+    (" R$ 12,50 ", 12.5),
+    (" R$ 1.000 ", 1000.0),
+    ("1.234.567", 1234567.0),
+    ("1.234.567,89", 1234567.89),
+    ("-1.000", -1000.0),
+    ("250", 250.0),
+    ("12.5", 12.5),
+])
+def test_converter_moeda_texto(texto, esperado):
+    assert ingestao.converter_moeda(pd.Series([texto], dtype=object)).tolist() == [esperado]
+
+
+def test_converter_moeda_celulas_do_xlsx():
+    # Células numéricas do Excel chegam como float/int: o ponto é decimal, nunca milhar
+    serie = pd.Series([1.234, 1000.0, 250, 1234.5, "R$ 1.000"], dtype=object)
+    assert ingestao.converter_moeda(serie).tolist() == [1.234, 1000.0, 250.0, 1234.5, 1000.0]
+
+
+def test_converter_moeda_invalida_ou_vazia_vira_nulo():
+    valores = ingestao.converter_moeda(pd.Series(["abc", "", None, "1,2,3"], dtype=object))
+    assert valores.isna().all()
+
+
+def test_normalizar_cpf_so_completa_celula_numerica():
+    serie = pd.Series([52998224725, 1234567890.0, "529.982.247-25", "123", None], dtype=object)
+    assert ingestao.normalizar_cpf(serie).tolist() == ["52998224725", "01234567890", "52998224725", "123", pd.NA]
+
+
+def test_processar_bloco_rejeita_moeda_e_cpf_invalidos():
+    bruto = pd.DataFrame({
+        "CPF": ["52998224725", "123", "11111111111", "39053344705"],
+        "Nome": ["A", "B", "C", "D"],
+        "Empresa": ["X", "X", "X", "X"],
+        "Margem": ["R$ 1.000", "R$ 10,00", "R$ 10,00", "abc"],
+        "Parcela Máxima": ["R$ -", "R$ 5,00", "R$ 5,00", "R$ 5,00"],
+    })
+    validas, rejeitadas = ingestao.processar_bloco(bruto, 2)
+    assert validas["cpf2"].tolist() == ["52998224725"]
+    assert validas["Margem"].tolist() == [1000.0]
+    assert validas["Parcela Maxima"].tolist() == [0.0]
+    assert rejeitadas["linha"].tolist() == [3, 4, 5]
+    assert rejeitadas["motivo"].tolist() == ["CPF inválido", "CPF inválido", "Margem inválida"]